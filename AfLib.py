@@ -1,6 +1,20 @@
 ﻿from graphviz import Digraph
 
 
+#Etiqueta de un estado: los estados de AFD tienen id entero (0 -> A, 25 -> Z, 26 -> AA)
+def state_label(state):
+    if not hasattr(state, 'id'):
+        return state.name
+
+    n = state.id
+    label = ''
+    while True:
+        label = chr(ord('A') + n % 26) + label
+        n = n // 26 - 1
+        if n < 0:
+            break
+    return label
+
 #Plot de Automata Finito
 def plot_af(state, graph=None, visited=None):
     if visited is None:
@@ -13,22 +27,22 @@ def plot_af(state, graph=None, visited=None):
         graph = Digraph(engine='dot', graph_attr={'rankdir': 'LR'})
     
     if state.is_accept:
-        graph.node(name=str(id(state)), label=state.name, shape='doublecircle', color="green")
+        graph.node(name=str(id(state)), label=state_label(state), shape='doublecircle', color="green")
         if len(visited)==0:
              graph.node(name="start", label="start", shape='point')
              graph.edge("start", str(id(state)), label="inicio")
     elif len(visited)==0:
         graph.node(name="start", label="start", shape='point')
-        graph.node(name=str(id(state)), label=state.name, shape='circle', color="blue")
+        graph.node(name=str(id(state)), label=state_label(state), shape='circle', color="blue")
         graph.edge("start", str(id(state)), label="inicio")
     else:
-        graph.node(name=str(id(state)), label=state.name, shape='circle')
+        graph.node(name=str(id(state)), label=state_label(state), shape='circle')
         
     visited.add(state)
 
     for symbol, next_states in state.transitions.items():
         for next_state in next_states:
-            graph.edge(str(id(state)), str(id(next_state)), label=symbol)
+            graph.edge(str(id(state)), str(id(next_state)), label=str(symbol))
             plot_af(next_state, graph, visited)
 
     return graph
@@ -1,16 +1,30 @@
-﻿from astLib import Node
-import AfLib
+﻿import AfLib
 import regexLib
 import astLib
 import AfdLib
+from array import array
+from collections import deque
+from bisect import bisect_right
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import pickle
+import json
+import mmap
+import os
+import struct
+import sys
 
 #Clase de estado de AFD
 class AFDState:
-    def __init__(self,afd,subset=set()):
-        self.name = str(afd.state_counter)
+    __slots__ = ('id', 'subset', 'transitions', 'is_accept', 'acceptPos', 'action')
+
+    def __init__(self,afd,subset=frozenset()):
+        #Identificador entero, la etiqueta para graficar se deriva de el (AfLib.state_label)
+        self.id = afd.state_counter
 
         #Modificacion de state_counter y states de la instancia de AFD dada
-        afd.state_counter = chr(ord(afd.state_counter) + 1)
+        afd.state_counter += 1
         afd.states.add(self)
 
         self.subset = subset
@@ -29,139 +43,184 @@ class AFD:
         self.accept = set()
         self.states = set()
         self.simulationStates = set()
-        self.state_counter = 'A'
+        self.state_counter = 0
+
+        #Tabla de acciones compiladas (ActionTable) para Lexer
+        self.action_table = None
+
+        #Indice de intervalos de las transiciones por CharSet, se construye al simular
+        self.range_index = None
+
+    #Serializacion plana: estados en lista y transiciones por id, sin recursion sobre el grafo
+    def __getstate__(self):
+        states = sorted(self.states, key=lambda state: state.id)
+        return {
+            'start': self.start.id if self.start is not None else None,
+            'state_counter': self.state_counter,
+            'action_table': self.action_table,
+            'states': [
+                (state.id, state.subset, state.is_accept, state.acceptPos, state.action,
+                 {symbol: next_states[0].id for symbol, next_states in state.transitions.items() if next_states})
+                for state in states
+            ],
+        }
+
+    def __setstate__(self, data):
+        self.accept = set()
+        self.states = set()
+        self.simulationStates = set()
+        self.state_counter = data['state_counter']
+        self.action_table = data['action_table']
+        self.range_index = None
+
+        by_id = {}
+        for state_id, subset, is_accept, acceptPos, action, transitions in data['states']:
+            state = AFDState.__new__(AFDState)
+            state.id = state_id
+            state.subset = subset
+            state.is_accept = is_accept
+            state.acceptPos = acceptPos
+            state.action = action
+            state.transitions = {}
+            by_id[state_id] = state
+            self.states.add(state)
+            if is_accept:
+                self.accept.add(state)
+
+        for state_id, subset, is_accept, acceptPos, action, transitions in data['states']:
+            for symbol, target in transitions.items():
+                by_id[state_id].transitions[symbol] = [by_id[target]]
+
+        self.start = by_id.get(data['start'])
     
+    #Simbolo de transicion para el caracter c: el mismo caracter o la clase (CharSet) que lo contiene
+    def classify(self,c):
+        if self.range_index is None:
+            classes = {symbol for state in self.states for symbol in state.transitions if isinstance(symbol, regexLib.CharSet)}
+            self.range_index = sorted((lo, hi, symbol) for symbol in classes for lo, hi in symbol.ranges)
+
+        if self.range_index and isinstance(c, str) and len(c) == 1:
+            cp = ord(c)
+            i = bisect_right(self.range_index, (cp, 0x10FFFF)) - 1
+            if i >= 0 and self.range_index[i][0] <= cp <= self.range_index[i][1]:
+                return self.range_index[i][2]
+        return c
+
     #Funcion utilizada para manejar los estados de una simulacion caracter por caracter
     def step_simulation(self,c,lookAhead):
         #Si los estados de simulacion son vacios, se reinicia con el estado inicial
         if len(self.simulationStates)==0:
             self.simulationStates.add(self.start)
 
-        self.simulationStates = AfLib.move(self.simulationStates,c)
+        self.simulationStates = AfLib.move(self.simulationStates,self.classify(c))
             
         return self.simulationStates
         
 
-#Algoritmo AST a AFD Directo        
-def ast_to_afdd(alphabet,ast_root):
-    states = []
-    
+#Algoritmo AST a AFD Directo, ast es el resultado de astLib.create_ast con sus propias tablas
+#Los subconjuntos de posiciones son mascaras de bits (int) y sirven directamente como llave de estado
+def ast_to_afdd(alphabet,ast):
     afd = AFD()
-    states.append(AFDState(afd,subset=ast_root.firstPos))
-    afd.start = states[0]
-    
-    for elemento in afd.start.subset:
-        if elemento in Node.posTable['■']:
-            afd.accept.add(states[0])
-            states[0].is_accept = True
-            #Persistencia del Pos de #
-            states[0].acceptPos = elemento
-            break
+    marks = ast.posTable['■']
+    followPos = ast.followPos
 
-    # if any(elemento in Node.posTable['#'] for elemento in afd.start.subset):
-    #     afd.accept.add(states[0])
-    #     states[0].is_accept = True
-    
-    contador=0
-    nuevosEstados=0
-    firstIteration = False
-    
-    while contador!=nuevosEstados or not firstIteration:
-        
-        firstIteration=True
-        
-        if nuevosEstados!=0:
-            contador+=1
-        
-        for symbol in alphabet:
+    #Indice de mascaras a estados para busquedas O(1)
+    index = {}
 
-            cambio=True
-            subset = set()
+    def new_state(subset):
+        state = AFDState(afd,subset)
+        index[subset] = state
 
-            for pos in states[contador].subset:
-                if pos in Node.posTable[symbol]:
-                    subset=subset.union(Node.followPosTable[pos])
-            
-            for state in states:
-                if state.subset==subset:
-                    states[contador].transitions[symbol] = [state]
-                    cambio=False
-                    break
-            
-            if cambio and len(subset)>0:
-                newState = AFDState(afd,subset)
-                
-                for elemento in subset:
-                    if elemento in Node.posTable['■']:
-                        afd.accept.add(newState)
-                        newState.is_accept = True
-                        #Persistencia del Pos de #
-                        newState.acceptPos = elemento
-                        break
-                
-                # if any(elemento in Node.posTable['#'] for elemento in subset):
-                #     afd.accept.add(newState)
-                #     newState.is_accept = True
-                
-                states[contador].transitions[symbol] = [newState]
-                states.append(newState)
-                nuevosEstados+=1
+        accepted = subset & marks
+        if accepted:
+            afd.accept.add(state)
+            state.is_accept = True
+            #Persistencia del Pos de #, la regla con menor posicion (bit mas bajo) tiene prioridad
+            state.acceptPos = (accepted & -accepted).bit_length() - 1
+        return state
+
+    afd.start = new_state(ast.firstPos)
+
+    #Simbolos del alfabeto (caracter o intervalo) que cubre cada posicion
+    symbol_positions = astLib.symbolPositions(alphabet, ast.posTable)
+    pos_symbols = [[] for i in range(len(followPos))]
+    for symbol in alphabet:
+        for pos in astLib.maskPositions(symbol_positions[symbol]):
+            pos_symbols[pos].append(symbol)
+    order = {symbol: i for i, symbol in enumerate(alphabet)}
+
+    #Lista de trabajo: cada estado se procesa una sola vez, en orden de creacion
+    worklist = deque([afd.start])
+    while worklist:
+        current = worklist.popleft()
+
+        #Union de Siguiente Pos por simbolo con OR de mascaras
+        targets = {}
+        for pos in astLib.maskPositions(current.subset):
+            follow = followPos[pos]
+            for symbol in pos_symbols[pos]:
+                targets[symbol] = targets.get(symbol, 0) | follow
+
+        for symbol in sorted(targets, key=order.__getitem__):
+            subset = targets[symbol]
+            if not subset:
+                continue
+
+            state = index.get(subset)
+            if state is None:
+                state = new_state(subset)
+                worklist.append(state)
+
+            current.transitions[symbol] = [state]
     
     return afd
 
 #Algoritmo AFN a AFD por subconjuntos       
 def afn_to_afd(alphabet,afn):
-    states = []
-    
-    So = set()
-    So.add(afn.start)
-    
     afd = AFD()
-    
-    states.append(AFDState(afd,subset=AfLib.e_closure(So)))
-    afd.start = states[0]
-    
-    if afn.accept in afd.start.subset:
-        afd.accept.add(states[0])
-        states[0].is_accept = True
-        
 
-    contador=0
-    nuevosEstados=0
-    firstIteration = False
+    #Indice de subconjuntos (frozenset) a estados para busquedas O(1)
+    index = {}
 
-    while contador!=nuevosEstados or not firstIteration:
-        
-        firstIteration=True
+    def new_state(subset):
+        state = AFDState(afd,subset)
+        index[subset] = state
+
+        if afn.accept in subset:
+            afd.accept.add(state)
+            state.is_accept = True
+        return state
+
+    afd.start = new_state(frozenset(AfLib.e_closure({afn.start})))
+
+    worklist = deque([afd.start])
+    while worklist:
+        current = worklist.popleft()
 
-        if nuevosEstados!=0:
-            contador+=1
-        
         for symbol in alphabet:
-            cambio=True
-            subset=AfLib.e_closure(AfLib.move(states[contador].subset,symbol))
-            
-            for state in states:
-                if state.subset==subset:
-                    states[contador].transitions[symbol] = [state]
-                    cambio=False
-                    break
-            
-            if cambio and len(subset)>0:
-                newState = AFDState(afd,subset)
-                
-                if afn.accept in subset:
-                    afd.accept.add(newState)
-                    newState.is_accept = True
-                
-                states[contador].transitions[symbol] = [newState]
-                states.append(newState)
-                nuevosEstados+=1
+            subset = AfLib.e_closure(AfLib.move(current.subset,symbol))
+
+            if not subset:
+                continue
+
+            subset = frozenset(subset)
+            state = index.get(subset)
+            if state is None:
+                state = new_state(subset)
+                worklist.append(state)
+
+            current.transitions[symbol] = [state]
     
     return afd
 
-#Minimizacion de AFD
+#Minimizacion de AFD (Hopcroft sobre la forma compilada), respeta las acciones de cada regla
 def afd_to_afdmin(alphabet, afd):
+    afd_min = compiled_to_afd(minimize_compiled(compile_afd(afd)))
+    afd_min.action_table = getattr(afd, 'action_table', None)
+    return afd_min
+
+#Minimizacion de AFD por refinamiento de Moore, se conserva para verificacion cruzada
+def afd_to_afdmin_moore(alphabet, afd):
     #Paso 1 algoritmo
     #Partición conjunto de todos los estados de aceptación y no aceptación (diferencia de conjuntos)
     partition = [afd.states - afd.accept, afd.accept]
@@ -245,7 +304,909 @@ def afd_to_afdmin(alphabet, afd):
                 new_state.transitions[c] = [new_destination_state]
 
     return afd_min
- 
+
+#Clase de AFD compilado a tablas planas de enteros
+class CompiledAFD:
+    def __init__(self):
+        #Estados numerados 0..n_states-1, el estado inicial siempre es 0
+        self.start = 0
+        self.n_states = 0
+        self.n_classes = 0
+
+        #Simbolos (caracteres o CharSet) de cada columna
+        self.symbols = []
+
+        #Mapa de caracter a columna (clase de equivalencia), incluye los intervalos por debajo de 256
+        self.char_map = {}
+
+        #Intervalos restantes ordenados: codepoints [range_lo[i], range_hi[i]] -> range_col[i]
+        self.range_lo = array('i')
+        self.range_hi = array('i')
+        self.range_col = array('i')
+
+        #Tabla de transiciones densa, fila por estado: table[state*n_classes+col], -1 = sin transicion
+        self.table = array('i')
+
+        #Tabla paralela de aceptacion: acceptPos del estado o -1 si no es de aceptacion
+        self.accept = array('i')
+
+        #Acciones por acceptPos
+        self.actions = {}
+        self.action_table = None
+
+    #Construccion de char_map y de los intervalos a partir de symbols
+    def build_lookup(self):
+        self.char_map = {}
+        ranges = []
+        for col, symbols in enumerate(self.symbols):
+            for symbol in symbols:
+                if isinstance(symbol, str):
+                    self.char_map[symbol] = col
+                    continue
+                for lo, hi in symbol.ranges:
+                    #Los caracteres de un byte se resuelven con char_map directamente
+                    for cp in range(lo, min(hi, 255) + 1):
+                        self.char_map[chr(cp)] = col
+                    if hi > 255:
+                        ranges.append((max(lo, 256), hi, col))
+
+        ranges.sort()
+        self.range_lo = array('i', [r[0] for r in ranges])
+        self.range_hi = array('i', [r[1] for r in ranges])
+        self.range_col = array('i', [r[2] for r in ranges])
+
+    #Columna de un caracter fuera de char_map por busqueda binaria en los intervalos, -1 si no existe
+    def range_column(self,c):
+        if not self.range_lo or len(c) != 1:
+            return -1
+        cp = ord(c)
+        i = bisect_right(self.range_lo, cp) - 1
+        if i >= 0 and cp <= self.range_hi[i]:
+            return self.range_col[i]
+        return -1
+
+    #Columna de un caracter, -1 si no pertenece al alfabeto
+    def column(self,c):
+        col = self.char_map.get(c)
+        if col is None:
+            return self.range_column(c)
+        return col
+
+    #Estado siguiente desde state con el caracter c, -1 si no existe
+    def next_state(self,state,c):
+        col = self.column(c)
+        if col < 0:
+            return -1
+        return self.table[state*self.n_classes+col]
+
+#Compilacion de un AFD (ast_to_afdd/afd_to_afdmin) a tablas planas
+def compile_afd(afd):
+    #Numeracion de estados por recorrido en anchura desde el estado inicial
+    order = [afd.start]
+    index = {afd.start: 0}
+    i = 0
+    while i<len(order):
+        for symbol, next_states in order[i].transitions.items():
+            for next_state in next_states:
+                if next_state not in index:
+                    index[next_state] = len(order)
+                    order.append(next_state)
+        i+=1
+
+    n_states = len(order)
+
+    #Columna de cada simbolo: destino por cada estado
+    columns = {}
+    for pos, state in enumerate(order):
+        for symbol, next_states in state.transitions.items():
+            if next_states:
+                columns.setdefault(symbol, [-1]*n_states)[pos] = index[next_states[0]]
+
+    #Clases de equivalencia: simbolos con columnas identicas comparten columna
+    classes = {}
+    symbols = []
+    for symbol in sorted(columns, key=str):
+        signature = tuple(columns[symbol])
+        if signature not in classes:
+            classes[signature] = len(classes)
+            symbols.append([])
+        symbols[classes[signature]].append(symbol)
+
+    n_classes = len(classes)
+    table = array('i', [-1])*(n_states*max(n_classes,1))
+    for signature, col in classes.items():
+        for pos, target in enumerate(signature):
+            table[pos*n_classes+col] = target
+
+    compiled = CompiledAFD()
+    compiled.n_states = n_states
+    compiled.n_classes = n_classes
+    compiled.symbols = symbols
+    compiled.build_lookup()
+    compiled.table = table
+    compiled.accept = array('i', [-1])*n_states
+
+    for pos, state in enumerate(order):
+        if state.is_accept:
+            compiled.accept[pos] = state.acceptPos
+            compiled.actions.setdefault(state.acceptPos, state.action)
+
+    compiled.action_table = getattr(afd, 'action_table', None)
+
+    return compiled
+
+#Reconstruccion de un AFD de objetos a partir de su forma compilada
+def compiled_to_afd(compiled):
+    afd = AFD()
+    states = [AFDState(afd) for i in range(compiled.n_states)]
+    afd.start = states[compiled.start]
+
+    symbols = compiled.symbols
+
+    for pos, state in enumerate(states):
+        if compiled.accept[pos] >= 0:
+            state.is_accept = True
+            state.acceptPos = compiled.accept[pos]
+            state.action = compiled.actions.get(state.acceptPos, "")
+            afd.accept.add(state)
+
+        for col in range(compiled.n_classes):
+            target = compiled.table[pos*compiled.n_classes+col]
+            if target >= 0:
+                for symbol in symbols[col]:
+                    state.transitions[symbol] = [states[target]]
+
+    return afd
+
+#Minimizacion de Hopcroft O(n·k·log n) sobre las tablas de un CompiledAFD
+#La particion inicial separa estados por acceptPos, asi estados de reglas distintas no se combinan
+def minimize_compiled(compiled):
+    n_classes = compiled.n_classes
+    table = compiled.table
+    #Estado sumidero n para completar el AFD
+    sink = compiled.n_states
+    n = sink + 1
+
+    def delta(s, c):
+        if s == sink:
+            return sink
+        t = table[s*n_classes+c]
+        return sink if t < 0 else t
+
+    #Transiciones inversas por clase
+    inverse = [[[] for s in range(n)] for c in range(n_classes)]
+    for s in range(n):
+        for c in range(n_classes):
+            inverse[c][delta(s, c)].append(s)
+
+    #Particion inicial por acceptPos (-1 para no aceptacion y el sumidero)
+    groups = {}
+    for s in range(compiled.n_states):
+        groups.setdefault(compiled.accept[s], set()).add(s)
+    groups.setdefault(-1, set()).add(sink)
+
+    blocks = list(groups.values())
+    block_of = [0]*n
+    for b, block in enumerate(blocks):
+        for s in block:
+            block_of[s] = b
+
+    worklist = {(b, c) for b in range(len(blocks)) for c in range(n_classes)}
+    while worklist:
+        splitter, c = worklist.pop()
+
+        #Estados que llegan al bloque splitter con la clase c, agrupados por su bloque
+        touched = {}
+        for t in blocks[splitter]:
+            for s in inverse[c][t]:
+                touched.setdefault(block_of[s], set()).add(s)
+
+        for b, inside in touched.items():
+            if len(inside) == len(blocks[b]):
+                continue
+
+            blocks[b] -= inside
+            new_b = len(blocks)
+            blocks.append(inside)
+            for s in inside:
+                block_of[s] = new_b
+
+            for d in range(n_classes):
+                if (b, d) in worklist:
+                    worklist.add((new_b, d))
+                elif len(inside) <= len(blocks[b]):
+                    worklist.add((new_b, d))
+                else:
+                    worklist.add((b, d))
+
+    #Numeracion de bloques por recorrido en anchura, el bloque del sumidero se descarta
+    dead = block_of[sink]
+    number = {block_of[compiled.start]: 0}
+    order = [block_of[compiled.start]]
+    i = 0
+    while i < len(order):
+        s = next(iter(blocks[order[i]]))
+        for c in range(n_classes):
+            b = block_of[delta(s, c)]
+            if b != dead and b not in number:
+                number[b] = len(order)
+                order.append(b)
+        i += 1
+
+    #Columnas del AFD minimo, las clases con columnas identicas se combinan
+    n_states = len(order)
+    columns = []
+    for c in range(n_classes):
+        column = []
+        for b in order:
+            t = block_of[delta(next(iter(blocks[b])), c)]
+            column.append(-1 if t == dead else number[t])
+        columns.append(tuple(column))
+
+    classes = {}
+    symbols = []
+    for col, column in enumerate(columns):
+        if column not in classes:
+            classes[column] = len(classes)
+            symbols.append([])
+        symbols[classes[column]].extend(compiled.symbols[col])
+
+    minimized = CompiledAFD()
+    minimized.n_states = n_states
+    minimized.n_classes = len(classes)
+    minimized.symbols = symbols
+    minimized.build_lookup()
+    minimized.table = array('i', [-1])*(n_states*max(len(classes),1))
+    for column, col in classes.items():
+        for pos, target in enumerate(column):
+            minimized.table[pos*len(classes)+col] = target
+
+    minimized.accept = array('i', [-1])*n_states
+    for pos, b in enumerate(order):
+        minimized.accept[pos] = compiled.accept[next(iter(blocks[b]))]
+    minimized.actions = dict(compiled.actions)
+    minimized.action_table = compiled.action_table
+
+    return minimized
+
+############################################################### TABLAS BINARIAS
+
+#Formato binario versionado de un CompiledAFD, pensado para abrirse con mmap sin copiar:
+#   encabezado TABLE_HEADER (magic, version, orden de bytes y tamanios)
+#   byte_map: 256 int32, columna de cada caracter < 256 (-1 si no pertenece al alfabeto)
+#   range_lo, range_hi, range_col: n_ranges int32 cada uno, intervalos ordenados de codepoints >= 256
+#   table: n_states*n_classes int32, transiciones (-1 = sin transicion)
+#   accept: n_states int32, acceptPos o -1
+#   indice de acciones: n_actions filas de 7 int32
+#       (acceptPos, accion, largo, nombre de regla, largo, codigo, largo), desplazamientos en el pool
+#       y largo -1 si la accion no tiene codigo compilable
+#   pool de cadenas UTF-8
+#Todas las secciones son int32 en el orden de bytes del encabezado
+TABLE_MAGIC = b'AFDT'
+TABLE_VERSION = 1
+TABLE_HEADER = struct.Struct('<4sHHiiiiii')
+BYTE_ORDERS = {'little': 1, 'big': 2}
+
+#Columnas de un CompiledAFD como byte_map (256 columnas) e intervalos (lo, hi, col) ordenados
+def lookup_arrays(compiled):
+    byte_map = array('i', [-1])*256
+    ranges = []
+    for c, col in compiled.char_map.items():
+        if len(c) != 1:
+            raise ValueError(f"Simbolo no representable en la tabla binaria: {c!r}")
+        if ord(c) < 256:
+            byte_map[ord(c)] = col
+        else:
+            ranges.append((ord(c), ord(c), col))
+    for i in range(len(compiled.range_lo)):
+        ranges.append((compiled.range_lo[i], compiled.range_hi[i], compiled.range_col[i]))
+    ranges.sort()
+    return byte_map, ranges
+
+#Bytes del formato binario de un AFD (se compila si es un AFD de objetos)
+def table_bytes(afd):
+    compiled = afd if isinstance(afd, CompiledAFD) else compile_afd(afd)
+
+    byte_map, ranges = lookup_arrays(compiled)
+
+    pool = bytearray()
+    def intern(text):
+        data = text.encode('utf-8')
+        offset = len(pool)
+        pool.extend(data)
+        return offset, len(data)
+
+    sources = compiled.action_table.sources if compiled.action_table is not None else {}
+    action_index = array('i')
+    for acceptPos in sorted(compiled.actions):
+        action = intern(compiled.actions[acceptPos] or "")
+        if acceptPos in sources:
+            rule_name, content = sources[acceptPos]
+            rule = intern(rule_name)
+            source = intern(content)
+        else:
+            rule = (0, -1)
+            source = (0, -1)
+        action_index.extend((acceptPos,) + action + rule + source)
+
+    sections = [
+        byte_map,
+        array('i', [r[0] for r in ranges]),
+        array('i', [r[1] for r in ranges]),
+        array('i', [r[2] for r in ranges]),
+        compiled.table,
+        compiled.accept,
+        action_index,
+    ]
+
+    header = TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, BYTE_ORDERS[sys.byteorder],
+                               compiled.start, compiled.n_states, compiled.n_classes,
+                               len(ranges), len(compiled.actions), len(pool))
+    return header + b''.join(section.tobytes() for section in sections) + bytes(pool)
+
+#Escritura del formato binario en path
+def dump_table(afd, path):
+    with open(path, 'wb') as archivo:
+        archivo.write(table_bytes(afd))
+
+#CompiledAFD sobre un buffer en el formato binario (bytes, mmap, ...): las tablas son
+#memoryviews del buffer, no se copian ni se construyen objetos por estado
+class MappedAFD(CompiledAFD):
+    def __init__(self, buffer, path=None):
+        self.path = path
+        self.buffer = buffer
+        view = memoryview(buffer)
+
+        if len(view) < TABLE_HEADER.size:
+            raise ValueError("Tabla binaria incompleta")
+        magic, version, order, start, n_states, n_classes, n_ranges, n_actions, pool_size = TABLE_HEADER.unpack_from(view)
+        if magic != TABLE_MAGIC:
+            raise ValueError("El archivo no es una tabla binaria de AFD")
+        if version != TABLE_VERSION:
+            raise ValueError(f"Version de tabla binaria no soportada: {version}")
+
+        self.start = start
+        self.n_states = n_states
+        self.n_classes = n_classes
+
+        offset = TABLE_HEADER.size
+        def section(count):
+            nonlocal offset
+            data = view[offset:offset+4*count]
+            offset += 4*count
+            if order != BYTE_ORDERS[sys.byteorder]:
+                #Orden de bytes distinto al de la maquina: se copia invirtiendo
+                swapped = array('i', data.tobytes())
+                swapped.byteswap()
+                return swapped
+            return data.cast('i')
+
+        byte_map = section(256)
+        self.range_lo = section(n_ranges)
+        self.range_hi = section(n_ranges)
+        self.range_col = section(n_ranges)
+        self.table = section(n_states*n_classes)
+        self.accept = section(n_states)
+        action_index = section(7*n_actions)
+        pool = view[offset:offset+pool_size]
+
+        self.char_map = {chr(cp): col for cp, col in enumerate(byte_map) if col >= 0}
+
+        def text(start, length):
+            return bytes(pool[start:start+length]).decode('utf-8')
+
+        self.actions = {}
+        self.action_table = None
+        for i in range(0, len(action_index), 7):
+            acceptPos, action, action_len, rule, rule_len, source, source_len = action_index[i:i+7]
+            self.actions[acceptPos] = text(action, action_len)
+            if source_len >= 0:
+                if self.action_table is None:
+                    self.action_table = ActionTable()
+                self.action_table.add(acceptPos, text(rule, rule_len), text(source, source_len))
+
+    #Simbolos de cada columna reconstruidos a partir de byte_map y los intervalos
+    @property
+    def symbols(self):
+        ranges = [[] for _ in range(self.n_classes)]
+        for c, col in self.char_map.items():
+            ranges[col].append((ord(c), ord(c)))
+        for i in range(len(self.range_lo)):
+            ranges[self.range_col[i]].append((self.range_lo[i], self.range_hi[i]))
+
+        symbols = []
+        for column in ranges:
+            charset = regexLib.CharSet(column)
+            if len(charset) == 1:
+                symbols.append([chr(charset.ranges[0][0])])
+            else:
+                symbols.append([charset])
+        return symbols
+
+    #Al serializar (por ejemplo hacia otro proceso) se vuelve a mapear el archivo
+    def __reduce__(self):
+        if self.path is not None:
+            return (load_table, (self.path,))
+        return (MappedAFD, (bytes(self.buffer),))
+
+#Apertura de una tabla binaria con mmap de solo lectura: los procesos que abren el mismo
+#archivo comparten las paginas de la cache del sistema operativo
+def load_table(path):
+    with open(path, 'rb') as archivo:
+        buffer = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    return MappedAFD(buffer, path)
+
+############################################################### GENERACION DE SCANNERS
+
+#Tipo de arreglo con signo mas pequenio que contiene todos los valores
+def array_typecode(values):
+    lo = min(values, default=0)
+    hi = max(values, default=0)
+    for typecode in ('b', 'h', 'i', 'q'):
+        limit = 1 << (8*array(typecode).itemsize - 1)
+        if -limit <= lo and hi < limit:
+            return typecode
+    raise ValueError("Valores fuera del rango de los arreglos")
+
+#Literal compacto de un arreglo: bytes little-endian del tipo mas pequenio
+def array_literal(values):
+    values = array(array_typecode(values), values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return f"array({values.typecode!r}, {values.tobytes()!r})"
+
+#Ciclo de reconocimiento de un segmento, igual a segmentRecognizeCompiled con las tablas embebidas
+TABLE_SEGMENT = '''
+def column(c):
+    cp = ord(c)
+    if cp < 256:
+        return BYTE_MAP[cp]
+    r = bisect_right(RANGE_LO, cp) - 1
+    return RANGE_COL[r] if r >= 0 and cp <= RANGE_HI[r] else -1
+
+#Segmento mas largo desde i: (True, fin, acceptPos) o (False, posicion del error, -1)
+#memo = [failed, furthest] se comparte entre llamadas sobre el mismo content (ver scan)
+def segment(content, i, memo=None):
+    if memo is None:
+        memo = [set(), 0]
+    failed, furthest = memo
+    if furthest and i >= furthest:
+        failed.clear()
+        furthest = memo[1] = 0
+
+    table = TABLE
+    accept = ACCEPT
+    byte_map = BYTE_MAP
+    n = len(content)
+
+    first = i
+    last = -1
+    lastAccept = -1
+    lastState = START
+    state = START
+    while i < n:
+        if i < furthest and i*N_STATES+state in failed:
+            break
+        cp = ord(content[i])
+        if cp < 256:
+            col = byte_map[cp]
+        else:
+            r = bisect_right(RANGE_LO, cp) - 1
+            col = RANGE_COL[r] if r >= 0 and cp <= RANGE_HI[r] else -1
+        if col < 0:
+            break
+        state = table[state*N_CLASSES+col]
+        if state < 0:
+            break
+        i += 1
+        if accept[state] >= 0:
+            last = i
+            lastAccept = accept[state]
+            lastState = state
+
+    #Los pares (estado, posicion) despues del ultimo aceptado no llevan a ningun token
+    if last >= 0:
+        p = last
+        state = lastState
+    else:
+        p = first
+        state = START
+    if i > p:
+        while p < i:
+            failed.add(p*N_STATES+state)
+            state = table[state*N_CLASSES+column(content[p])]
+            p += 1
+        failed.add(i*N_STATES+state)
+        memo[1] = max(furthest, i+1)
+
+    if last >= 0:
+        return (True, last, lastAccept)
+    return (False, i, -1)
+'''
+
+#Funciones comunes de los scanners autonomos (las acciones y los tokens usan segment)
+STANDALONE_RUNTIME = '''
+def runAction(acceptPos, value):
+    try:
+        return ACTIONS[acceptPos](value)
+    except Exception as e:
+        print(f"Error al ejecutar el codigo: {e}")
+        return None
+
+def advance_position(content, start, end, line, col):
+    saltos = content.count('\\n', start, end)
+    if saltos:
+        return line + saltos, end - content.rfind('\\n', start, end)
+    return line, col + end - start
+
+#Segmentos (acceptPos, inicio, fin, linea, columna), las corridas de error tienen acceptPos -1
+#memo guarda los pares (estado, posicion) que no llevan a ningun token, asi el escaneo es lineal
+def scan(content):
+    n = len(content)
+    line = 1
+    col = 1
+    error_start = -1
+    memo = [set(), 0]
+    i = 0
+    while i < n:
+        accepted, end, acceptPos = segment(content, i, memo)
+        if not accepted:
+            if error_start < 0:
+                error_start = i
+            i += 1
+            continue
+        if error_start >= 0:
+            yield (-1, error_start, i, line, col)
+            line, col = advance_position(content, error_start, i, line, col)
+            error_start = -1
+        yield (acceptPos, i, end, line, col)
+        line, col = advance_position(content, i, end, line, col)
+        i = end
+    if error_start >= 0:
+        yield (-1, error_start, n, line, col)
+
+def tokensRecognize(txtContent, tokens_path=None):
+    tokens = []
+    for acceptPos, first, end, line, col in scan(txtContent):
+        value = txtContent[first:end]
+
+        print("------------------------------------------------------------------------------------")
+
+        if acceptPos < 0:
+            print(f"ERROR en el caracter {first} (linea {line}, columna {col})  (No aceptado):  '{value}'")
+            continue
+
+        print("Cadena o caracter aceptado => " + "'" + value + "'")
+        resultado = runAction(acceptPos, value)
+        resultado = resultado if resultado!=None else ""
+
+        token = TOKENS.get(acceptPos)
+        if token:
+            tokens.append(token)
+
+        print(resultado + " \\n")
+    print("------------------------------------------------------------------------------------")
+
+    if tokens_path is not None:
+        with open(tokens_path, 'wb') as archivo_tokens:
+            pickle.dump(tokens, archivo_tokens)
+
+    return True
+'''
+
+#Intervalos de codepoints de cada columna de un CompiledAFD
+def column_ranges(compiled):
+    byte_map, ranges = lookup_arrays(compiled)
+    columns = [[] for _ in range(compiled.n_classes)]
+    for cp, col in enumerate(byte_map):
+        if col >= 0:
+            columns[col].append((cp, cp))
+    for lo, hi, col in ranges:
+        columns[col].append((lo, hi))
+    return columns
+
+#Clases (o estados) con mas intervalos que este limite se prueban con bisect en lugar de comparaciones
+DIRECT_MAX_COMPARISONS = 4
+
+#Clases (o estados) que cubren hasta este numero de caracteres se prueban con un frozenset (o dict)
+DIRECT_MAX_SET = 256
+
+#Indentacion maxima del codigo de los estados anidados dentro de una misma funcion
+DIRECT_MAX_INLINE = 40
+
+#Codigo del ciclo de reconocimiento codificado directamente (estilo re2c): cada estado del AFD
+#es una funcion state_k(content, i, n, last, lastAccept, failed, furthest) que consume los lazos
+#del estado sobre si mismo con un while, actualiza el ultimo aceptado y devuelve
+#(destino, i, last, lastAccept, lazo) con i despues del caracter de la transicion (destino -1 si no
+#hay) y lazo la posicion donde termino el lazo.
+#Los estados sin lazo con un solo predecesor (p. ej. el trie de las palabras clave) se anidan en la
+#funcion del predecesor en lugar de tener la suya, y segment salta entre funciones por la tupla
+#STATES, asi cada transicion cuesta O(1) en el numero de estados.
+#Todo ciclo del AFD pasa por un estado con funcion; segment registra en failed los pares
+#(estado con funcion, posicion) fallidos y cada funcion se detiene al llegar a uno (tiempo lineal).
+#Devuelve (codigo, constantes) donde constantes son las fronteras de las clases y estados grandes
+def direct_segment(compiled):
+    columns = column_ranges(compiled)
+    n_classes = compiled.n_classes
+    constantes = []
+
+    #Condicion que prueba si c esta en los intervalos
+    def test(intervals):
+        if len(intervals) > DIRECT_MAX_COMPARISONS and sum(hi - lo + 1 for lo, hi in intervals) <= DIRECT_MAX_SET:
+            caracteres = ''.join(chr(cp) for lo, hi in intervals for cp in range(lo, hi + 1))
+            constantes.append(f"CLASS_{len(constantes)} = frozenset({caracteres!r})")
+            return f"c in CLASS_{len(constantes)-1}"
+        if len(intervals) > DIRECT_MAX_COMPARISONS:
+            bounds = []
+            for lo, hi in intervals:
+                bounds.extend((lo, hi + 1))
+            constantes.append(f"BOUNDS_{len(constantes)} = {tuple(bounds)!r}")
+            return f"bisect_right(BOUNDS_{len(constantes)-1}, ord(c)) & 1"
+        pruebas = []
+        for lo, hi in intervals:
+            if lo == hi:
+                pruebas.append(f"c == {chr(lo)!r}")
+            else:
+                pruebas.append(f"{chr(lo)!r} <= c <= {chr(hi)!r}")
+        return " or ".join(pruebas)
+
+    #Destinos de cada estado: {destino: intervalos}
+    transiciones = []
+    predecesores = [set() for _ in range(compiled.n_states)]
+    for state in range(compiled.n_states):
+        destinos = {}
+        for col in range(n_classes):
+            target = compiled.table[state*n_classes+col]
+            if target >= 0:
+                destinos.setdefault(target, []).extend(columns[col])
+        destinos = {target: regexLib.CharSet(intervals).ranges for target, intervals in destinos.items()}
+        transiciones.append(destinos)
+        for target in destinos:
+            if target != state:
+                predecesores[target].add(state)
+
+    #Estados que necesitan funcion propia (el inicial y los destinos que no se anidan)
+    funciones = [compiled.start]
+    con_funcion = {compiled.start}
+
+    def salto(target, pad, lineas):
+        if target not in con_funcion:
+            con_funcion.add(target)
+            funciones.append(target)
+        lineas.append(f"{pad}return {target}, i, last, lastAccept, lazo")
+
+    def anidable(target, indent):
+        return (len(predecesores[target]) == 1 and target != compiled.start and target not in transiciones[target]
+                and indent < DIRECT_MAX_INLINE and target not in con_funcion)
+
+    #Arbol binario de comparaciones sobre target (ya calculado con bisect) entre los destinos
+    #posibles; cada hoja anida el estado o salta a su funcion
+    def arbol(targets, indent, lineas):
+        pad = "    " * indent
+        if len(targets) == 1:
+            if anidable(targets[0], indent):
+                emit(targets[0], indent, lineas)
+            else:
+                salto(targets[0], pad, lineas)
+            return
+        medio = len(targets) // 2
+        lineas.append(f"{pad}if target < {targets[medio]}:")
+        arbol(targets[:medio], indent + 1, lineas)
+        arbol(targets[medio:], indent, lineas)
+
+    #Inicio de la funcion de un estado: lazo con la prueba de pares fallidos en cada posicion
+    def entrada(state, lineas):
+        destinos = transiciones[state]
+        aceptado = compiled.accept[state]
+        if aceptado >= 0:
+            fallo = f"return -1, i, i, {aceptado}, i"
+        else:
+            fallo = "return -1, i, last, lastAccept, i"
+        if state in destinos:
+            lineas.append("    while i < n:")
+            lineas.append(f"        if i < furthest and i*N_STATES+{state} in failed:")
+            lineas.append(f"            {fallo}")
+            lineas.append("        c = content[i]")
+            lineas.append(f"        if not ({test(destinos[state])}):")
+            lineas.append("            break")
+            lineas.append("        i += 1")
+        else:
+            lineas.append(f"    if i < furthest and i*N_STATES+{state} in failed:")
+            lineas.append(f"        {fallo}")
+        lineas.append("    lazo = i")
+
+    def emit(state, indent, lineas):
+        pad = "    " * indent
+        destinos = dict(transiciones[state])
+        destinos.pop(state, None)
+        if compiled.accept[state] >= 0:
+            lineas.append(f"{pad}last = i")
+            lineas.append(f"{pad}lastAccept = {compiled.accept[state]}")
+        if not destinos:
+            lineas.append(f"{pad}return -1, i, last, lastAccept, lazo")
+            return
+
+        lineas.append(f"{pad}if i >= n:")
+        lineas.append(f"{pad}    return -1, i, last, lastAccept, lazo")
+        lineas.append(f"{pad}c = content[i]")
+        intervalos = sorted((lo, hi, target) for target, intervals in destinos.items() for lo, hi in intervals)
+        if len(intervalos) > DIRECT_MAX_COMPARISONS and sum(hi - lo + 1 for lo, hi, _ in intervalos) <= DIRECT_MAX_SET:
+            #Destino por caracter en un dict
+            k = len(constantes)
+            mapa = {chr(cp): target for lo, hi, target in intervalos for cp in range(lo, hi + 1)}
+            constantes.append(f"MAP_{k} = {mapa!r}")
+            lineas.append(f"{pad}target = MAP_{k}.get(c, -1)")
+        elif len(intervalos) > DIRECT_MAX_COMPARISONS:
+            #Busqueda binaria: el hueco k entre fronteras tiene el destino TARGETS[k]
+            bounds = []
+            targets = [-1]
+            for lo, hi, target in intervalos:
+                if bounds and bounds[-1] == lo:
+                    targets[-1] = target
+                else:
+                    bounds.append(lo)
+                    targets.append(target)
+                bounds.append(hi + 1)
+                targets.append(-1)
+            k = len(constantes)
+            constantes.append(f"BOUNDS_{k} = {tuple(bounds)!r}")
+            constantes.append(f"TARGETS_{k} = {tuple(targets)!r}")
+            lineas.append(f"{pad}target = TARGETS_{k}[bisect_right(BOUNDS_{k}, ord(c))]")
+        if len(intervalos) > DIRECT_MAX_COMPARISONS:
+            lineas.append(f"{pad}if target < 0:")
+            lineas.append(f"{pad}    return -1, i, last, lastAccept, lazo")
+            lineas.append(f"{pad}i += 1")
+            arbol(sorted(destinos), indent, lineas)
+            return
+
+        ordenados = sorted(destinos.items(), key=lambda item: item[1][0])
+        for k, (target, intervals) in enumerate(ordenados):
+            lineas.append(f"{pad}{'if' if k == 0 else 'elif'} {test(intervals)}:")
+            lineas.append(f"{pad}    i += 1")
+            if anidable(target, indent):
+                emit(target, indent + 1, lineas)
+            else:
+                salto(target, pad + "    ", lineas)
+        lineas.append(f"{pad}return -1, i, last, lastAccept, lazo")
+
+    lineas = []
+    k = 0
+    while k < len(funciones):
+        state = funciones[k]
+        lineas.append(f"def state_{state}(content, i, n, last, lastAccept, failed, furthest):")
+        entrada(state, lineas)
+        emit(state, 1, lineas)
+        lineas.append("")
+        k += 1
+
+    lineas += [
+        "STATES = (" + ", ".join(f"state_{state}" if state in con_funcion else "None" for state in range(compiled.n_states)) + ",)",
+        f"N_STATES = {compiled.n_states}",
+        "",
+        "#Segmento mas largo desde i: (True, fin, acceptPos) o (False, posicion del error, -1)",
+        "#memo = [failed, furthest] se comparte entre llamadas sobre el mismo content (ver scan)",
+        "def segment(content, i, memo=None):",
+        "    if memo is None:",
+        "        memo = [set(), 0]",
+        "    failed, furthest = memo",
+        "    if furthest and i >= furthest:",
+        "        failed.clear()",
+        "        furthest = memo[1] = 0",
+        "",
+        "    n = len(content)",
+        "    first = i",
+        "    last = -1",
+        "    lastAccept = -1",
+        f"    state = {compiled.start}",
+        "    while state >= 0:",
+        "        state, i, last, lastAccept, lazo = STATES[state](content, i, n, last, lastAccept, failed, furthest)",
+        "",
+        "    #Si se leyo mas alla del ultimo aceptado se repite el recorrido registrando las posiciones",
+        "    #de cada estado con funcion desde ese punto (no llevan a ningun token)",
+        "    base = last if last >= 0 else first",
+        "    if i > base:",
+        "        j = first",
+        "        lastRegistro = -1",
+        "        acceptRegistro = -1",
+        f"        state = {compiled.start}",
+        "        while state >= 0:",
+        "            estado = state",
+        "            inicio = j",
+        "            state, j, lastRegistro, acceptRegistro, lazo = STATES[state](content, j, n, lastRegistro, acceptRegistro, failed, furthest)",
+        "            for p in range(max(inicio, base), lazo + 1):",
+        "                failed.add(p*N_STATES+estado)",
+        "        memo[1] = max(furthest, i+1)",
+        "",
+        "    if last >= 0:",
+        "        return (True, last, lastAccept)",
+        "    return (False, i, -1)",
+    ]
+    return "\n".join(lineas), constantes
+
+#Codigo fuente de un scanner autonomo: el ciclo de reconocimiento especializado y las acciones
+#de las reglas como funciones del modulo. El modulo generado solo depende de la biblioteca estandar.
+#backend 'table': tablas embebidas como literales de arreglos
+#backend 'direct': cada estado es codigo Python (direct_segment)
+#Con tokens_path los nombres de token (print("X") de la accion) se guardan en ese pkl,
+#igual que tokensRecognizeYAL con BufferedTokenSink
+def scanner_module(afd, header="", footer="", input_path='entrada1.txt', tokens_path=None, backend='table'):
+    compiled = afd if isinstance(afd, CompiledAFD) else compile_afd(afd)
+    sources = compiled.action_table.sources if compiled.action_table is not None else {}
+
+    partes = [
+        "# Scanner autonomo generado por scanFrame.py",
+        "import sys",
+        "import pickle",
+        "from array import array",
+        "from bisect import bisect_right",
+        "",
+        header,
+        "",
+    ]
+
+    if backend == 'table':
+        byte_map, ranges = lookup_arrays(compiled)
+        partes += [
+            "#Tablas del AFD (little-endian)",
+            f"START = {compiled.start}",
+            f"N_STATES = {compiled.n_states}",
+            f"N_CLASSES = {compiled.n_classes}",
+            f"BYTE_MAP = {array_literal(byte_map)}",
+            f"RANGE_LO = {array_literal([r[0] for r in ranges])}",
+            f"RANGE_HI = {array_literal([r[1] for r in ranges])}",
+            f"RANGE_COL = {array_literal([r[2] for r in ranges])}",
+            f"TABLE = {array_literal(compiled.table)}",
+            f"ACCEPT = {array_literal(compiled.accept)}",
+            "if sys.byteorder == 'big':",
+            "    for tabla in (BYTE_MAP, RANGE_LO, RANGE_HI, RANGE_COL, TABLE, ACCEPT):",
+            "        tabla.byteswap()",
+            TABLE_SEGMENT,
+        ]
+    elif backend == 'direct':
+        codigo, constantes = direct_segment(compiled)
+        if constantes:
+            partes.append("#Fronteras de las clases grandes (c esta en la clase si bisect_right es impar)")
+            partes.append("#y de los estados con muchas transiciones (destino TARGETS_k[bisect_right(BOUNDS_k, ord(c))]);")
+            partes.append("#las clases y estados pequenios usan CLASS_k (frozenset) y MAP_k (dict)")
+            partes += constantes
+            partes.append("")
+        partes += [codigo, ""]
+    else:
+        raise ValueError(f"Backend de scanner desconocido: {backend}")
+
+    partes.append("#Acciones de las reglas")
+
+    acciones = []
+    tokens = {}
+    for acceptPos in sorted(compiled.actions):
+        action = compiled.actions[acceptPos] or ""
+        if acceptPos in sources:
+            rule_name, content = sources[acceptPos]
+        else:
+            rule_name, content = None, action[2:-1]
+        funcion = f"action_{acceptPos}"
+        if rule_name is not None:
+            partes.append(f"#Regla {rule_name}")
+        partes.append(actionSource(content).replace('def tempFunction', 'def ' + funcion, 1))
+        acciones.append(f"{acceptPos}: {funcion}")
+        token = action_token(action) if tokens_path is not None else None
+        if token:
+            tokens[acceptPos] = token
+
+    partes.append("ACTIONS = {" + ", ".join(acciones) + "}")
+    partes.append(f"TOKENS = {tokens!r}")
+    partes.append(STANDALONE_RUNTIME)
+    partes.append('if __name__ == "__main__":')
+    partes.append("    #Lectura del documento txt")
+    partes.append(f"    with open({input_path!r}, 'r', encoding='utf-8') as file:")
+    partes.append("        txtContent = file.read()  # Leer todo el contenido del archivo")
+    partes.append("")
+    partes.append(f"    tokensRecognize(txtContent, {tokens_path!r})")
+    partes.append("")
+    partes.append(footer)
+    partes.append("")
+    return "\n".join(partes)
+
 def AFD_simulation(afd,w):
     F = afd.accept
     So = set()
@@ -261,10 +1222,10 @@ def AFD_simulation(afd,w):
                 i+=1
                 continue
             if c=='\\' and w[i+1]=='s':
-                S = AfLib.move(S,' ')
+                S = AfLib.move(S,afd.classify(' '))
                 i+=1
             else:
-                S = AfLib.move(S,c)
+                S = AfLib.move(S,afd.classify(c))
             i+=1
     
     if S:
@@ -279,8 +1240,8 @@ def AFD_simulation(afd,w):
     
 def createAFD(item):
     postfix = regexLib.shunting_yard(item)
-    ast_root = astLib.create_ast(postfix)
-    afd = ast_to_afdd(regexLib.regexAlphabet(postfix),ast_root)
+    ast = astLib.create_ast(postfix)
+    afd = ast_to_afdd(regexLib.regexAlphabet(postfix),ast)
     afdmin = afd_to_afdmin(regexLib.regexAlphabet(postfix),afd)
     
     return afdmin
@@ -290,13 +1251,47 @@ def step_simulate_AFD(afd,c,lookAhead):
     state = list(res)[0] if len(list(res))>0 else None
 
     if state in afd.accept:
-        return (0,state.action)
+        return (0,state.action,state.acceptPos)
     elif state in afd.states:
         return (1,"")
     else:
         return (2,"")
             
+#Reconocimiento de un segmento sobre las tablas de un CompiledAFD
+def segmentRecognizeCompiled(afd,i,content):
+    table = afd.table
+    accept = afd.accept
+    char_map = afd.char_map
+    n_classes = afd.n_classes
+    n = len(content)
+
+    first = i
+    last = -1
+    lastState = -1
+    state = afd.start
+    while i < n:
+        col = char_map.get(content[i])
+        if col is None:
+            col = afd.range_column(content[i])
+            if col < 0:
+                break
+        state = table[state*n_classes+col]
+        if state < 0:
+            break
+        if accept[state] >= 0:
+            last = i+1
+            lastState = state
+        i += 1
+
+    if last >= 0:
+        return (True,last,content[first:last],afd.actions[accept[lastState]],accept[lastState])
+    else:
+        return (False,i,"","")
+
 def segmentRecognize(afd,i,content):
+    if isinstance(afd,CompiledAFD):
+        return segmentRecognizeCompiled(afd,i,content)
+
     accept = (False,0,"")
     first = i
     while i <= len(content):
@@ -306,7 +1301,7 @@ def segmentRecognize(afd,i,content):
         res = step_simulate_AFD(afd, char, lookAhead)
         if res[0] == 0:
             last = i+1
-            accept = (True,last,content[first:last],res[1])
+            accept = (True,last,content[first:last],res[1],res[2])
         
         elif res[0] == 2:
             if accept[0]:
@@ -316,10 +1311,8 @@ def segmentRecognize(afd,i,content):
 
         i += 1
         
-def genericFunction(value, content):
-    local_namespace = {}  # Corrected dictionary initialization
-    local_namespace['value'] = value
-
+#Codigo fuente de la funcion de una accion
+def actionSource(content):
     # Start defining the function as a string
     codigo_funcion = 'def tempFunction(value):\n'
     if content:
@@ -329,52 +1322,226 @@ def genericFunction(value, content):
     else:
         codigo_funcion += '    return None\n'
 
-    codigo_funcion += 'resultado = tempFunction(value)\n'  # Correct line break
+    return codigo_funcion
 
+#Compilacion de la accion de una regla a una funcion, una sola vez
+def compile_action(content, rule_name=None):
     try:
-        # Execute the function definition and then call the function
-        exec(codigo_funcion, globals(), local_namespace)
+        code = compile(actionSource(content), f"<regla {rule_name}>", 'exec')
+    except SyntaxError as e:
+        raise SyntaxError(f"Error de compilacion en la accion de la regla '{rule_name}': {e}") from e
 
-        # Return the result of the function
-        return local_namespace['resultado']
+    local_namespace = {}
+    exec(code, globals(), local_namespace)
+    return local_namespace['tempFunction']
 
+#Ejecucion de una accion compilada
+def runAction(function, value):
+    try:
+        return function(value)
     except Exception as e:
         print(f"Error al ejecutar el codigo: {e}")
         return None
+
+#Tabla de acciones compiladas por acceptPos
+class ActionTable:
+    def __init__(self):
+        #acceptPos -> (nombre de regla, codigo de la accion)
+        self.sources = {}
+        #acceptPos -> funcion compilada
+        self.functions = {}
+
+    def add(self, acceptPos, rule_name, content):
+        self.functions[acceptPos] = compile_action(content, rule_name)
+        self.sources[acceptPos] = (rule_name, content)
+
+    def __contains__(self, acceptPos):
+        return acceptPos in self.functions
+
+    def run(self, acceptPos, value):
+        return runAction(self.functions[acceptPos], value)
+
+    #Las funciones no se serializan, se recompilan al cargar
+    def __getstate__(self):
+        return {'sources': self.sources}
+
+    def __setstate__(self, state):
+        self.sources = {}
+        self.functions = {}
+        for acceptPos, (rule_name, content) in state['sources'].items():
+            self.add(acceptPos, rule_name, content)
+
+def genericFunction(value, content):
+    try:
+        function = compile_action(content)
+    except SyntaxError as e:
+        print(f"Error al ejecutar el codigo: {e}")
+        return None
+
+    return runAction(function, value)
+
+#Resultado de la accion de un segmento aceptado
+def segmentAction(afd, res):
+    action_table = getattr(afd, 'action_table', None)
+    if action_table is not None and res[4] in action_table:
+        return action_table.run(res[4], res[2])
+    return genericFunction(res[2], res[3][2:-1])
             
-def tokensRecognize(afd,txtContent):
-    first = 0
-    while first<=len(txtContent):
-        res = segmentRecognize(afd,first,txtContent)
-    
-        nextFirst = res[1]
+#Linea y columna (desde 1) despues de avanzar sobre content[start:end]
+def advance_position(content, start, end, line, col):
+    saltos = content.count('\n', start, end)
+    if saltos:
+        return line + saltos, end - content.rfind('\n', start, end)
+    return line, col + end - start
 
-        print("------------------------------------------------------------------------------------")
+#Motor de coincidencia mas larga sobre un CompiledAFD
+#Recorre content desde first y produce (acceptPos, inicio, fin, linea, columna) por segmento:
+#   - cada token es el lexema aceptado mas largo (ultimo estado de aceptacion visto)
+#   - las corridas de caracteres desde los que no se reconoce ningun token se juntan en un
+#     solo segmento de error con acceptPos -1
+#Reiniciar es O(1) (volver al estado inicial) y la linea y columna se calculan por segmento
+#Tiempo lineal (Reps, "Maximal-munch tokenization in linear time"): los pares (estado, posicion)
+#recorridos despues del ultimo aceptado no llevan a ningun token y se registran en failed; un
+#recorrido posterior que llega a uno de esos pares se detiene ahi, asi cada posicion se visita O(1) veces
+def scan_segments(afd, content, first=0):
+    if not isinstance(afd, CompiledAFD):
+        afd = compile_afd(afd)
 
-        if res[0]:
-            print("Cadena o caracter aceptado => " + "'" + res[2] + "'")
-            resultado = genericFunction(res[2], res[3][2:-1])
-            resultado = resultado if resultado!=None else ""
-            print(resultado + " \n")
-        elif not res[0] and first!=len(txtContent):
-            message = f"ERROR en el caracter {res[1]}  (No aceptado): "
-            nextFirst+=1
-            print(message + " " + "'" +txtContent[first:nextFirst] + "'")
-                
-        else:
-            nextFirst+=1
+    table = afd.table
+    accept = afd.accept
+    char_map = afd.char_map
+    range_column = afd.range_column
+    n_classes = afd.n_classes
+    n_states = afd.n_states
+    start = afd.start
+    n = len(content)
+
+    line = 1
+    col = 1
+    if first:
+        line, col = advance_position(content, 0, first, line, col)
+
+    #Pares fallidos como posicion*n_states+estado; furthest es 1 + la posicion mas lejana registrada
+    failed = set()
+    furthest = 0
+
+    error_start = -1
+    i = first
+    while i < n:
+        if furthest and i >= furthest:
+            #Los recorridos empiezan en i o despues, ningun par registrado se vuelve a consultar
+            failed.clear()
+            furthest = 0
+
+        j = i
+        last = -1
+        lastAccept = -1
+        lastState = start
+        state = start
+        while j < n:
+            if j < furthest and j*n_states+state in failed:
+                break
+            c = char_map.get(content[j])
+            if c is None:
+                c = range_column(content[j])
+                if c < 0:
+                    break
+            state = table[state*n_classes+c]
+            if state < 0:
+                break
+            j += 1
+            if accept[state] >= 0:
+                last = j
+                lastAccept = accept[state]
+                lastState = state
+
+        #Se repite el tramo posterior al ultimo aceptado registrando sus pares como fallidos
+        p, state = (last, lastState) if last >= 0 else (i, start)
+        if j > p:
+            while p < j:
+                failed.add(p*n_states+state)
+                c = char_map.get(content[p])
+                if c is None:
+                    c = range_column(content[p])
+                state = table[state*n_classes+c]
+                p += 1
+            failed.add(j*n_states+state)
+            furthest = max(furthest, j+1)
+
+        if last < 0:
+            if error_start < 0:
+                error_start = i
+            i += 1
+            continue
+
+        if error_start >= 0:
+            yield (-1, error_start, i, line, col)
+            line, col = advance_position(content, error_start, i, line, col)
+            error_start = -1
+
+        yield (lastAccept, i, last, line, col)
+        line, col = advance_position(content, i, last, line, col)
+        i = last
+
+    if error_start >= 0:
+        yield (-1, error_start, n, line, col)
 
-        first = nextFirst
+#Impresion de un segmento de scan_segments; devuelve el resultado de la accion (None en errores)
+def printSegment(afd, content, segment):
+    acceptPos, first, end, line, col = segment
+    value = content[first:end]
+
+    print("------------------------------------------------------------------------------------")
+
+    if acceptPos < 0:
+        print(f"ERROR en el caracter {first} (linea {line}, columna {col})  (No aceptado):  '{value}'")
+        return None
+
+    print("Cadena o caracter aceptado => " + "'" + value + "'")
+    resultado = segmentAction(afd, (True, end, value, afd.actions[acceptPos], acceptPos))
+    resultado = resultado if resultado!=None else ""
+    print(resultado + " \n")
+    return resultado
+
+def tokensRecognize(afd,txtContent):
+    if not isinstance(afd, CompiledAFD):
+        afd = compile_afd(afd)
+
+    for segment in scan_segments(afd, txtContent):
+        printSegment(afd, txtContent, segment)
+    print("------------------------------------------------------------------------------------")
             
     return True
 
-def parseGrammar(value):
-    import pickle 
+#Especificacion YAPar en memoria (gramatica, tokens ignorados y tokens declarados)
+#Mientras hay una activa (active_spec), las acciones del .yalp la llenan en lugar de los pkl
+class YaparSpec:
+    def __init__(self):
+        self.grammar = dict()
+        self.ignore_tokens = set()
+        self.compare_tokens = []
 
-   # Cargar el diccionario de gramática existente
-    with open('grammar.pkl', 'rb') as archivo_entrada_grammar:
-        grammar = pickle.load(archivo_entrada_grammar)
+active_spec = None
+
+#Escanea una especificacion .yalp ejecutando las acciones de cada token sobre una YaparSpec nueva
+def load_spec(afd, txtContent):
+    global active_spec
+    if not isinstance(afd, CompiledAFD):
+        afd = compile_afd(afd)
+
+    spec = YaparSpec()
+    previous = active_spec
+    active_spec = spec
+    try:
+        for acceptPos, first, end, line, col in scan_segments(afd, txtContent):
+            if acceptPos >= 0:
+                segmentAction(afd, (True, end, txtContent[first:end], afd.actions[acceptPos], acceptPos))
+    finally:
+        active_spec = previous
+    return spec
 
+#Produccion 'head: body | body;' como (head, [bodies]), None si el formato es incorrecto
+def parseProduction(value):
     # Comprobar y procesar la entrada
     if value[-1] == ';':
         value = value[:-1]  # Eliminar el punto y coma final si está presente
@@ -390,6 +1557,23 @@ def parseGrammar(value):
     body = []
     for item in parts[1].split('|'):
         body.append(item.strip())
+    return head, body
+
+def parseGrammar(value):
+    import pickle 
+
+    production = parseProduction(value)
+    if production is None:
+        return
+    head, body = production
+
+    if active_spec is not None:
+        active_spec.grammar[head] = body
+        return
+
+   # Cargar el diccionario de gramática existente
+    with open('grammar.pkl', 'rb') as archivo_entrada_grammar:
+        grammar = pickle.load(archivo_entrada_grammar)
 
     # Actualizar el diccionario de gramática
     grammar[head] = body
@@ -402,6 +1586,10 @@ def parseGrammar(value):
 def ignoreTokens(value):
     import pickle
 
+    if active_spec is not None:
+        active_spec.ignore_tokens.update(item for item in value[6:].split(' ') if item != '')
+        return
+
     # Cargar el diccionario de gramática existente
     with open('ignore_tokens.pkl', 'rb') as archivo_entrada_token:
         ignore_tokens = pickle.load(archivo_entrada_token)
@@ -418,8 +1606,11 @@ def ignoreTokens(value):
 def compareTokens(value):
     import pickle 
     
-    with open('compare_tokens.pkl', 'rb') as archivo_entrada_compare_tokens:
-        compare_tokens = pickle.load(archivo_entrada_compare_tokens)
+    if active_spec is not None:
+        compare_tokens = active_spec.compare_tokens
+    else:
+        with open('compare_tokens.pkl', 'rb') as archivo_entrada_compare_tokens:
+            compare_tokens = pickle.load(archivo_entrada_compare_tokens)
 
     lineas = value.strip().split('\n')
     
@@ -431,12 +1622,17 @@ def compareTokens(value):
             partes = linea.replace('%token', '').strip().split()
             tokens.extend(partes) 
 
+    if active_spec is not None:
+        return
+
     with open('compare_tokens.pkl', 'wb') as archivo_compare_tokens:
         pickle.dump(tokens, archivo_compare_tokens)
 
 ############################################################### YAL
 
 def segmentRecognizeYAL(afd,i,content):
+    if isinstance(afd,CompiledAFD):
+        return segmentRecognizeCompiled(afd,i,content)
     
     accept = (False,0,"")
     first = i
@@ -447,7 +1643,7 @@ def segmentRecognizeYAL(afd,i,content):
         res = step_simulate_AFD(afd, char, lookAhead)
         if res[0] == 0:
             last = i+1
-            accept = (True,last,content[first:last],res[1])
+            accept = (True,last,content[first:last],res[1],res[2])
         
         elif res[0] == 2:
             if accept[0]:
@@ -467,42 +1663,722 @@ def extract_token(action):
     if start_quote != -1 and end_quote != -1:
         return action[start_quote + 1:end_quote]
     return None
+
+#Nombre de token de una accion: print("X"), return "X" o return X
+def action_token(action):
+    token = extract_token(action)
+    if token is not None:
+        return token
+
+    start = action.find('return ')
+    if start == -1:
+        return None
+    partes = action[start + len('return '):].split()
+    if not partes:
+        return None
+    token = partes[0].strip('"\'')
+    if token in ('', 'none', 'None', '}'):
+        return None
+    return token
         
         
-def tokensRecognizeYAL(afd,txtContent):
-    import pickle 
-    
-    with open('input_tokens.pkl', 'rb') as archivo_entrada:
-        input_tokens = pickle.load(archivo_entrada)
+#Sumidero de tokens en memoria: el pickle de la lista completa se escribe al hacer flush
+#Cada flush reescribe toda la lista, para escribir periodicamente se usa StreamTokenSink
+class BufferedTokenSink:
+    def __init__(self, path='input_tokens.pkl'):
+        self.path = path
+        self.tokens = []
+        self.pending = 0
+        self.written = False
+
+    def write(self, token):
+        self.tokens.append(token)
+        self.pending += 1
+
+    #Sin tokens nuevos desde la ultima escritura el archivo ya esta al dia
+    def flush(self):
+        if self.written and self.pending == 0:
+            return
+        with open(self.path, 'wb') as archivo_tokens:
+            pickle.dump(self.tokens, archivo_tokens)
+        self.pending = 0
+        self.written = True
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+#Sumidero de tokens en modo streaming: solo agrega registros, un token JSON por linea
+class StreamTokenSink:
+    def __init__(self, path='input_tokens.jsonl', flush_every=None, append=False):
+        self.path = path
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self.flush_every = flush_every
+        self.pending = 0
+
+    def write(self, token):
+        self.file.write(json.dumps(token) + '\n')
+        self.pending += 1
+        if self.flush_every and self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+#Lectura incremental de tokens escritos por BufferedTokenSink (.pkl) o StreamTokenSink (.jsonl)
+def read_tokens(path='input_tokens.pkl'):
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as archivo_tokens:
+            for linea in archivo_tokens:
+                if linea.strip():
+                    yield json.loads(linea)
+    else:
+        with open(path, 'rb') as archivo_tokens:
+            yield from pickle.load(archivo_tokens)
+
+def tokensRecognizeYAL(afd,txtContent,sink=None):
+    #Por defecto los tokens se acumulan en memoria y se escriben una vez al final
+    own_sink = sink is None
+    if own_sink:
+        sink = BufferedTokenSink('input_tokens.pkl')
+
+    if not isinstance(afd, CompiledAFD):
+        afd = compile_afd(afd)
+
+    #Token de cada acceptPos, extraido una sola vez
+    tokens = {acceptPos: action_token(action) for acceptPos, action in afd.actions.items()}
+
+    for segment in scan_segments(afd, txtContent):
+        printSegment(afd, txtContent, segment)
+        if segment[0] >= 0:
+            token = tokens[segment[0]]
+            if token:
+                sink.write(token)
+    print("------------------------------------------------------------------------------------")
+
+    #Un sumidero del llamador lo cierra el llamador
+    if own_sink:
+        sink.close()
+            
+    return True
+
+############################################################### STREAMING
 
+#Nombre de token utilizado para los segmentos no reconocidos
+ERROR_TOKEN = '<error>'
+
+#Fragmentos de texto de una fuente: str, archivo (read) o iterador de str
+def iter_chunks(source, chunk_size=65536):
+    if isinstance(source, str):
+        yield source
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+#Scanner por generador: lee la fuente por fragmentos y solo mantiene en memoria el lexema en curso
+#Produce tuplas (token_name, lexeme, offset, line, col), line y col inician en 1
+#Mismo motor que scan_segments: las corridas de caracteres no reconocidos son un solo ERROR_TOKEN
+def iter_tokens(afd, source, chunk_size=65536):
+    if not isinstance(afd, CompiledAFD):
+        afd = compile_afd(afd)
+
+    table = afd.table
+    accept = afd.accept
+    char_map = afd.char_map
+    n_classes = afd.n_classes
+    n_states = afd.n_states
+    names = {acceptPos: action_token(action) for acceptPos, action in afd.actions.items()}
+
+    chunks = iter_chunks(source, chunk_size)
+    buffer = ""
+    #Offset absoluto de buffer[0] y posicion del inicio del lexema en curso
+    base = 0
     first = 0
-    while first<=len(txtContent):
-        res = segmentRecognizeYAL(afd,first,txtContent)
-    
-        nextFirst = res[1]
+    eof = False
+    line = 1
+    col = 1
+    #Inicio en buffer de la corrida de error pendiente, -1 si no hay
+    error_start = -1
+    #Pares (estado, posicion absoluta) fallidos, igual que en scan_segments
+    failed = set()
+    furthest = 0
+
+    while True:
+        if furthest and base+first >= furthest:
+            failed.clear()
+            furthest = 0
+
+        i = first
+        last = -1
+        lastState = afd.start
+        state = afd.start
+        while True:
+            if i >= len(buffer):
+                if eof:
+                    break
+                chunk = next(chunks, None)
+                if chunk is None:
+                    eof = True
+                    break
+                #Solo se conserva desde el inicio del lexema (o de la corrida de error) en curso
+                keep = first if error_start < 0 else error_start
+                buffer = buffer[keep:] + chunk
+                base += keep
+                i -= keep
+                first -= keep
+                if last >= 0:
+                    last -= keep
+                if error_start >= 0:
+                    error_start -= keep
+                continue
+
+            if base+i < furthest and (base+i)*n_states+state in failed:
+                break
+            c = char_map.get(buffer[i])
+            if c is None:
+                c = afd.range_column(buffer[i])
+                if c < 0:
+                    break
+            state = table[state*n_classes+c]
+            if state < 0:
+                break
+            i += 1
+            if accept[state] >= 0:
+                last = i
+                lastState = state
+
+        p, state = (last, lastState) if last >= 0 else (first, afd.start)
+        if i > p:
+            while p < i:
+                failed.add((base+p)*n_states+state)
+                c = char_map.get(buffer[p])
+                if c is None:
+                    c = afd.range_column(buffer[p])
+                state = table[state*n_classes+c]
+                p += 1
+            failed.add((base+i)*n_states+state)
+            furthest = max(furthest, base+i+1)
+
+        if first >= len(buffer):
+            if error_start >= 0:
+                yield (ERROR_TOKEN, buffer[error_start:first], base+error_start, line, col)
+            return
+
+        if last < 0:
+            if error_start < 0:
+                error_start = first
+            first += 1
+            continue
+
+        if error_start >= 0:
+            yield (ERROR_TOKEN, buffer[error_start:first], base+error_start, line, col)
+            line, col = advance_position(buffer, error_start, first, line, col)
+            error_start = -1
+
+        yield (names[accept[lastState]], buffer[first:last], base+first, line, col)
+        line, col = advance_position(buffer, first, last, line, col)
+        first = last
+
+############################################################### BYTES
+
+#Secuencias de intervalos de bytes UTF-8 que codifican los codepoints [lo, hi]
+#Cada secuencia es una tupla de (byte_lo, byte_hi) del mismo largo que la codificacion;
+#los surrogates (D800-DFFF) no tienen codificacion UTF-8 y se omiten
+def utf8_sequences(lo, hi):
+    sequences = []
+    pending = [(lo, hi)]
+    while pending:
+        lo, hi = pending.pop()
+        if lo > hi:
+            continue
+        if lo <= 0xDFFF and hi >= 0xD800:
+            pending.append((lo, 0xD7FF))
+            pending.append((0xE000, hi))
+            continue
+
+        #Intervalos con codificaciones de distinto largo se separan
+        partido = False
+        for limite in (0x7F, 0x7FF, 0xFFFF):
+            if lo <= limite < hi:
+                pending.append((lo, limite))
+                pending.append((limite + 1, hi))
+                partido = True
+                break
+        if partido:
+            continue
+
+        if hi <= 0x7F:
+            sequences.append(((lo, hi),))
+            continue
+
+        #Se separa hasta que cada byte de continuacion recorra un intervalo completo
+        for i in range(1, 4):
+            mask = (1 << (6*i)) - 1
+            if lo & ~mask != hi & ~mask:
+                if lo & mask != 0:
+                    pending.append((lo, lo | mask))
+                    pending.append(((lo | mask) + 1, hi))
+                    partido = True
+                    break
+                if hi & mask != mask:
+                    pending.append((lo, (hi & ~mask) - 1))
+                    pending.append((hi & ~mask, hi))
+                    partido = True
+                    break
+        if partido:
+            continue
+
+        inicio = chr(lo).encode('utf-8')
+        fin = chr(hi).encode('utf-8')
+        sequences.append(tuple(zip(inicio, fin)))
+    return sequences
+
+#AFD sobre bytes: fila de 256 transiciones por estado, table[state*256+byte] (-1 = sin transicion)
+class ByteAFD:
+    def __init__(self):
+        self.start = 0
+        self.n_states = 0
+        self.table = array('i')
+        #acceptPos del estado o -1
+        self.accept = array('i')
+        self.actions = {}
+        self.action_table = None
+
+#Compilacion de un AFD a bytes: las transiciones por codepoint se expanden a sus secuencias UTF-8.
+#Los estados intermedios (dentro de un caracter multibyte) se identifican por el conjunto de
+#(bytes que faltan, destino) que representan, y el resultado se minimiza con Hopcroft
+def compile_bytes(afd):
+    compiled = afd if isinstance(afd, CompiledAFD) else compile_afd(afd)
+    columns = column_ranges(compiled)
+    n_classes = compiled.n_classes
+
+    #Pendientes de cada nodo: [(secuencia de intervalos de bytes, destino)]
+    pendientes = []
+    for state in range(compiled.n_states):
+        pares = []
+        for col in range(n_classes):
+            target = compiled.table[state*n_classes+col]
+            if target >= 0:
+                for lo, hi in columns[col]:
+                    for sequence in utf8_sequences(lo, hi):
+                        pares.append((sequence, target))
+        pendientes.append(pares)
+
+    intermedios = {}
+    rows = []
+    i = 0
+    while i < len(pendientes):
+        row = array('i', [-1])*256
+        continuaciones = {}
+        for sequence, target in pendientes[i]:
+            b_lo, b_hi = sequence[0]
+            for b in range(b_lo, b_hi + 1):
+                if len(sequence) == 1:
+                    row[b] = target
+                else:
+                    continuaciones.setdefault(b, set()).add((sequence[1:], target))
+        for b, pares in continuaciones.items():
+            key = frozenset(pares)
+            node = intermedios.get(key)
+            if node is None:
+                node = len(pendientes)
+                intermedios[key] = node
+                pendientes.append(sorted(key))
+            row[b] = node
+        rows.append(row)
+        i += 1
+
+    #Forma de CompiledAFD con un simbolo por byte para reutilizar minimize_compiled
+    byte_afd = CompiledAFD()
+    byte_afd.n_states = len(rows)
+    byte_afd.n_classes = 256
+    byte_afd.symbols = [[chr(b)] for b in range(256)]
+    byte_afd.build_lookup()
+    byte_afd.table = array('i')
+    for row in rows:
+        byte_afd.table.extend(row)
+    byte_afd.accept = array('i', compiled.accept) + array('i', [-1])*(len(rows) - compiled.n_states)
+    byte_afd.actions = dict(compiled.actions)
+    minimized = minimize_compiled(byte_afd)
+
+    result = ByteAFD()
+    result.start = minimized.start
+    result.n_states = minimized.n_states
+    result.table = array('i', [-1])*(minimized.n_states*256)
+    for b in range(256):
+        col = minimized.char_map.get(chr(b))
+        if col is None:
+            continue
+        for state in range(minimized.n_states):
+            result.table[state*256+b] = minimized.table[state*minimized.n_classes+col]
+    result.accept = minimized.accept
+    result.actions = dict(compiled.actions)
+    result.action_table = compiled.action_table
+    return result
+
+#Motor de coincidencia mas larga sobre bytes (bytes, bytearray, mmap o memoryview de bytes)
+#Produce (acceptPos, inicio, fin) con desplazamientos en bytes, sin copiar los lexemas;
+#las corridas de bytes no reconocidos se juntan en un segmento con acceptPos -1
+#Con stop solo se inician segmentos antes de stop (el ultimo puede terminar despues)
+def scan_bytes(afd, data, first=0, stop=None):
+    if not isinstance(afd, ByteAFD):
+        afd = compile_bytes(afd)
+
+    table = afd.table
+    accept = afd.accept
+    start = afd.start
+    n_states = afd.n_states
+    n = len(data)
+    stop = n if stop is None else min(stop, n)
+
+    #Pares (estado, posicion) fallidos, igual que en scan_segments
+    failed = set()
+    furthest = 0
+
+    error_start = -1
+    i = first
+    while i < stop:
+        if furthest and i >= furthest:
+            failed.clear()
+            furthest = 0
+
+        j = i
+        last = -1
+        lastAccept = -1
+        lastState = start
+        state = start
+        while j < n:
+            if j < furthest and j*n_states+state in failed:
+                break
+            state = table[(state << 8) | data[j]]
+            if state < 0:
+                break
+            j += 1
+            if accept[state] >= 0:
+                last = j
+                lastAccept = accept[state]
+                lastState = state
+
+        p, state = (last, lastState) if last >= 0 else (i, start)
+        if j > p:
+            while p < j:
+                failed.add(p*n_states+state)
+                state = table[(state << 8) | data[p]]
+                p += 1
+            failed.add(j*n_states+state)
+            furthest = max(furthest, j+1)
+
+        if last < 0:
+            if error_start < 0:
+                error_start = i
+            i += 1
+            continue
+
+        if error_start >= 0:
+            yield (-1, error_start, i)
+            error_start = -1
+
+        yield (lastAccept, i, last)
+        i = last
+
+    if error_start >= 0:
+        yield (-1, error_start, i)
+
+#Tokens en modo bytes: (token_name, inicio, fin); el lexema es data[inicio:fin]
+def iter_tokens_bytes(afd, data):
+    if not isinstance(afd, ByteAFD):
+        afd = compile_bytes(afd)
+    names = {acceptPos: action_token(action) for acceptPos, action in afd.actions.items()}
+    for acceptPos, first, end in scan_bytes(afd, data):
+        yield (names[acceptPos] if acceptPos >= 0 else ERROR_TOKEN, first, end)
+
+#Contenido de un archivo como memoryview sobre un mmap de solo lectura
+def map_file(path):
+    with open(path, 'rb') as archivo:
+        if os.fstat(archivo.fileno()).st_size == 0:
+            return memoryview(b'')
+        return memoryview(mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ))
+
+#Lexema de un segmento como str, solo se copia y decodifica cuando se necesita
+def lexeme_text(data, first, end):
+    return bytes(data[first:end]).decode('utf-8', errors='replace')
+
+#tokensRecognize sobre bytes: las acciones reciben el lexema decodificado
+def tokensRecognizeBytes(afd, data):
+    if not isinstance(afd, ByteAFD):
+        afd = compile_bytes(afd)
+
+    for acceptPos, first, end in scan_bytes(afd, data):
+        value = lexeme_text(data, first, end)
 
         print("------------------------------------------------------------------------------------")
 
-        if res[0]:
-            print("Cadena o caracter aceptado => " + "'" + res[2] + "'")
-            resultado = genericFunction(res[2], res[3][2:-1])
-            resultado = resultado if resultado!=None else ""
+        if acceptPos < 0:
+            print(f"ERROR en el byte {first}  (No aceptado):  '{value}'")
+            continue
 
-            token = extract_token(res[3])
-            if token:
-                input_tokens.append(token)
-            with open('input_tokens.pkl', 'wb') as archivo_entrada:
-                pickle.dump(input_tokens, archivo_entrada)
-
-            print(resultado + " \n")
-        elif not res[0] and first!=len(txtContent):
-            message = f"ERROR en el caracter {res[1]}  (No aceptado): "
-            nextFirst+=1
-            print(message + " " + "'" +txtContent[first:nextFirst] + "'")
-                
+        print("Cadena o caracter aceptado => " + "'" + value + "'")
+        resultado = segmentAction(afd, (True, end, value, afd.actions[acceptPos], acceptPos))
+        resultado = resultado if resultado!=None else ""
+        print(resultado + " \n")
+    print("------------------------------------------------------------------------------------")
+
+    return True
+
+############################################################### PARALELO
+
+#Lexing de archivos grandes por bloques en un ProcessPoolExecutor. Cada worker escanea su bloque
+#suponiendo que un token empieza justo en el inicio del bloque (inicio especulativo) y revisa su
+#propio limite: sigue escaneando despues del fin del bloque hasta una posicion donde el escaneo
+#especulativo del bloque siguiente tambien inicia un segmento. Los workers devuelven arrays planos
+#que el proceso principal concatena sin crear tuplas. El resultado tiene los mismos segmentos que
+#scan_bytes sobre todo el archivo
+
+PARALLEL_CHUNK_SIZE = 1 << 22
+
+#Por debajo de este tamano el escaneo es secuencial, el costo de los procesos no se recupera
+PARALLEL_MIN_SIZE = 1 << 20
+
+#Estado de cada proceso worker: AFD de bytes (sin acciones) y contenido
+parallel_worker = {}
+
+#source es la ruta del archivo (cada worker hace su propio mmap) o (nombre, tamano) de un bloque
+#de memoria compartida con el contenido, asi el contenido no se copia a cada worker
+def parallel_init(table, accept, start, source):
+    afd = ByteAFD()
+    afd.table = table
+    afd.accept = accept
+    afd.start = start
+    afd.n_states = len(accept)
+    parallel_worker['afd'] = afd
+    if isinstance(source, str):
+        parallel_worker['data'] = map_file(source)
+    else:
+        parallel_worker['memoria'] = shared_memory.SharedMemory(name=source[0])
+        parallel_worker['size'] = source[1]
+
+#Segmentos de [first, stop) como array plano (acceptPos, inicio, fin, ...), seguidos de los del
+#escaneo real despues de stop hasta sincronizar con el escaneo especulativo desde stop; el array
+#termina en la posicion de sincronizacion (o en el fin del contenido)
+def parallel_chunk(first, stop):
+    afd = parallel_worker['afd']
+    memoria = parallel_worker.get('memoria')
+    data = parallel_worker['data'] if memoria is None else memoria.buf[:parallel_worker['size']]
+    try:
+        flat = array('q', chain.from_iterable(scan_bytes(afd, data, first, stop)))
+        position = flat[-1]
+        siguiente = scan_bytes(afd, data, stop)
+        segment = next(siguiente, None)
+        actual = None
+        while True:
+            #Segmento especulativo que contiene position
+            while segment is not None and segment[2] <= position:
+                segment = next(siguiente, None)
+            if segment is None:
+                break
+            #Sincroniza si position es inicio de un segmento especulativo o cae en una corrida de
+            #error especulativa (desde cada byte de la corrida el escaneo falla igual)
+            if segment[1] == position or segment[0] < 0:
+                break
+
+            if actual is None:
+                actual = scan_bytes(afd, data, position)
+            real = next(actual)
+            if real[0] >= 0:
+                flat.extend(real)
+                position = real[2]
+                continue
+
+            #Dentro de una corrida de error real sincroniza en la primera posicion que tambien
+            #esta en una corrida de error especulativa
+            sync = -1
+            while segment is not None and segment[1] < real[2]:
+                if segment[0] < 0 and segment[2] > real[1] + 1:
+                    sync = max(segment[1], real[1] + 1)
+                    break
+                if segment[2] > real[2]:
+                    break
+                segment = next(siguiente, None)
+            if sync >= 0:
+                flat.extend((-1, real[1], sync))
+                break
+            flat.extend(real)
+            position = real[2]
+        return flat
+    finally:
+        if memoria is not None:
+            data.release()
+
+#Limites de los bloques; cada inicio se corre al byte siguiente a un salto de linea cuando el
+#contenido permite buscarlo (los tokens rara vez cruzan lineas, asi se sincroniza de inmediato)
+def chunk_bounds(data, chunk_size):
+    n = len(data)
+    find = getattr(data, 'find', None)
+    if find is None and isinstance(data, memoryview) and hasattr(data.obj, 'find'):
+        find = data.obj.find
+    bounds = [0]
+    while bounds[-1] + chunk_size < n:
+        inicio = bounds[-1] + chunk_size
+        if find is not None:
+            salto = find(b'\n', inicio, min(n, inicio + chunk_size))
+            if salto >= 0:
+                inicio = salto + 1
+        if inicio >= n:
+            break
+        bounds.append(inicio)
+    bounds.append(n)
+    return bounds
+
+#Une los arrays de los bloques en orden. Cada array termina en una posicion donde el bloque
+#siguiente ya escanea igual que el escaneo secuencial: solo se recorta el inicio de cada bloque
+#hasta esa posicion y se juntan las corridas de error contiguas de bloques distintos
+def stitch_chunks(chunks):
+    segments = array('q')
+    position = 0
+    for flat in chunks:
+        if not flat or flat[-1] <= position:
+            #Un segmento anterior cubre todo el bloque
+            continue
+        k = 0
+        if flat[1] < position:
+            #position es inicio de un segmento del bloque o cae en una de sus corridas de error
+            k = 3*(bisect_right(flat[1::3], position) - 1)
+        acceptPos = flat[k]
+        if acceptPos < 0 and segments and segments[-3] < 0 and segments[-1] == position:
+            segments[-1] = flat[k+2]
         else:
-            nextFirst+=1
+            segments.extend((acceptPos, position, flat[k+2]))
+        segments.extend(flat[k+3:])
+        position = flat[-1]
+    return segments
 
-        first = nextFirst
-            
-    return True
\ No newline at end of file
+#Segmentos (acceptPos, inicio, fin) de un array plano de scan_parallel
+def flat_segments(flat):
+    valores = iter(flat)
+    return zip(valores, valores, valores)
+
+#Segmentos de un archivo (ruta) o contenido en bytes escaneado por bloques en paralelo, como array
+#plano (acceptPos, inicio, fin, ...); list(flat_segments(...)) es identico a list(scan_bytes(afd, contenido))
+def scan_parallel(afd, source, workers=None, chunk_size=PARALLEL_CHUNK_SIZE):
+    if not isinstance(afd, ByteAFD):
+        afd = compile_bytes(afd)
+    data = map_file(source) if isinstance(source, str) else memoryview(source)
+    bounds = chunk_bounds(data, chunk_size)
+    if workers == 1 or len(bounds) <= 2 or len(data) < PARALLEL_MIN_SIZE:
+        return array('q', chain.from_iterable(scan_bytes(afd, data)))
+
+    if isinstance(source, str):
+        memoria = None
+        initargs = (afd.table, afd.accept, afd.start, source)
+    else:
+        #Una sola copia del contenido en memoria compartida para todos los workers
+        memoria = shared_memory.SharedMemory(create=True, size=len(data))
+        memoria.buf[:len(data)] = data
+        initargs = (afd.table, afd.accept, afd.start, (memoria.name, len(data)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=parallel_init, initargs=initargs) as pool:
+            return stitch_chunks(pool.map(parallel_chunk, bounds[:-1], bounds[1:]))
+    finally:
+        if memoria is not None:
+            memoria.close()
+            memoria.unlink()
+
+############################################################### LOTES
+
+#Lexing de muchos documentos cortos con un solo AFD compilado (y su tabla de acciones). Cada
+#documento produce la misma lista de tokens que list(iter_tokens(afd, documento)); los errores
+#de un documento quedan en su resultado sin detener el lote
+
+#Resultado de un documento del lote: tokens si se pudo escanear, error (la excepcion) si no
+class BatchResult:
+    def __init__(self, index, tokens=None, error=None):
+        self.index = index
+        self.tokens = tokens
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f"BatchResult({self.index}, {len(self.tokens)} tokens)"
+        return f"BatchResult({self.index}, error={self.error!r})"
+
+#Lexer compartido por todos los documentos: el AFD compilado y el nombre de token de cada acceptPos
+class BatchLexer:
+    def __init__(self, afd):
+        self.afd = afd if isinstance(afd, CompiledAFD) else compile_afd(afd)
+        self.names = {acceptPos: action_token(action) for acceptPos, action in self.afd.actions.items()}
+
+    #Tokens (token_name, lexeme, offset, line, col) de un documento: str, bytes en UTF-8 o archivo
+    def tokens(self, document):
+        if hasattr(document, 'read'):
+            document = document.read()
+        if isinstance(document, (bytes, bytearray, memoryview)):
+            document = bytes(document).decode('utf-8')
+        if not isinstance(document, str):
+            raise TypeError(f"documento no soportado: {type(document).__name__}")
+
+        names = self.names
+        return [(names[acceptPos] if acceptPos >= 0 else ERROR_TOKEN, document[first:end], first, line, col)
+                for acceptPos, first, end, line, col in scan_segments(self.afd, document)]
+
+    def run(self, index, document):
+        try:
+            return BatchResult(index, self.tokens(document))
+        except Exception as e:
+            return BatchResult(index, error=e)
+
+    def run_item(self, item):
+        return self.run(*item)
+
+#Lexer de cada proceso worker del lote
+batch_worker = {}
+
+def batch_init(afd):
+    batch_worker['lexer'] = BatchLexer(afd)
+
+def batch_document(item):
+    return batch_worker['lexer'].run_item(item)
+
+#Escanea un iterable de documentos y devuelve un BatchResult por documento, en el mismo orden
+#pool: None (en el proceso actual), 'thread' o 'process'; workers es el maximo de hilos o procesos
+def scan_batch(afd, documents, pool=None, workers=None, chunksize=64):
+    lexer = afd if isinstance(afd, BatchLexer) else BatchLexer(afd)
+
+    if pool is None:
+        return [lexer.run(index, document) for index, document in enumerate(documents)]
+    if pool == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lexer.run_item, enumerate(documents)))
+    if pool == 'process':
+        #Los archivos abiertos no se pueden enviar a otro proceso, se leen antes
+        items = [(index, document.read() if hasattr(document, 'read') else document)
+                 for index, document in enumerate(documents)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=batch_init, initargs=(lexer.afd,)) as executor:
+            return list(executor.map(batch_document, items, chunksize=chunksize))
+    raise ValueError(f"pool desconocido: {pool}")
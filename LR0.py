@@ -2,29 +2,41 @@
 from graphviz import Digraph
 from tabulate import tabulate
 from abc import ABC, abstractmethod
+from collections import deque
+from array import array
 import pickle
+import cacheLib
 
 #Clase de estado de LR Automata
+#Los items son enteros de la gramatica compilada (ver CompiledGrammar)
 class LRAutomataState:
-    def __init__(self,afd,canonicalSet=set()):
+    def __init__(self,afd,items=frozenset()):
         self.name = afd.state_counter
+        self.id = int(self.name[1:])
 
         #Modificacion de state_counter y states de la instancia de AFD dada
         afd.state_counter = afd.state_counter[0]+str(int(afd.state_counter[1:]) + 1)
         afd.states.add(self)
 
-        self.canonicalSet = canonicalSet
+        self.grammar = afd.grammar
+        self.items = items
 
         self.transitions = {}
         self.is_accept = False
 
+    #Items como tuplas (cabeza, cuerpo, indice del punto)
+    @property
+    def canonicalSet(self):
+        return {self.grammar.item_tuple(item) for item in self.items}
+
 #Clase LRAutomata
 class LRAutomata:
-    def __init__(self):
+    def __init__(self,grammar=None):
         self.start = None
         self.accept = set()
         self.states = set()
         self.state_counter = 'I'+str(0)
+        self.grammar = grammar
 
 # Funcion para representar un item en forma de string
 def represent_item(item):
@@ -49,86 +61,165 @@ def augment_grammar(grammar):
     new_grammar.update(grammar)
     return new_grammar
 
+#Gramatica compilada: simbolos internados a enteros y producciones como tuplas de enteros
+#Los no terminales ocupan los ids 0..n_non_terminals-1 (en orden de la gramatica),
+#los terminales siguen en orden de aparicion y '$' es el ultimo simbolo
+#La regla 0 es la primera produccion del simbolo inicial
+#Un item es un entero: item_base[regla] + indice del punto
+class CompiledGrammar:
+    def __init__(self,grammar):
+        self.grammar = grammar
+        self.symbols = list(grammar.keys())
+        self.symbol_id = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.n_non_terminals = len(self.symbols)
+        self.start = 0
+
+        #Reglas numeradas, '' (cuerpo vacio) se omite
+        self.rule_head = []
+        self.rule_body = []
+        self.rules_of = [[] for _ in range(self.n_non_terminals)]
+        for head, bodies in grammar.items():
+            for body in bodies:
+                ids = []
+                for symbol in body.split(' '):
+                    if symbol == '':
+                        continue
+                    if symbol not in self.symbol_id:
+                        self.symbol_id[symbol] = len(self.symbols)
+                        self.symbols.append(symbol)
+                    ids.append(self.symbol_id[symbol])
+                self.rules_of[self.symbol_id[head]].append(len(self.rule_head))
+                self.rule_head.append(self.symbol_id[head])
+                self.rule_body.append(tuple(ids))
+
+        self.end = len(self.symbols)
+        self.symbols.append('$')
+        self.symbol_id['$'] = self.end
+
+        #Items: regla, punto y simbolo despues del punto (-1 si el punto esta al final)
+        self.item_base = []
+        self.item_rule = []
+        self.item_dot = []
+        self.item_next = []
+        for rule, body in enumerate(self.rule_body):
+            self.item_base.append(len(self.item_rule))
+            for dot in range(len(body) + 1):
+                self.item_rule.append(rule)
+                self.item_dot.append(dot)
+                self.item_next.append(body[dot] if dot < len(body) else -1)
+
+        #Cerradura precalculada de cada no terminal: items con el punto al inicio
+        #de todas las producciones alcanzables por el simbolo mas a la izquierda
+        self.closure_items = []
+        for nt in range(self.n_non_terminals):
+            reached = [nt]
+            seen = {nt}
+            items = []
+            for current in reached:
+                for rule in self.rules_of[current]:
+                    item = self.item_base[rule]
+                    items.append(item)
+                    symbol = self.item_next[item]
+                    if 0 <= symbol < self.n_non_terminals and symbol not in seen:
+                        seen.add(symbol)
+                        reached.append(symbol)
+            self.closure_items.append(tuple(items))
+
+    def is_non_terminal(self,symbol):
+        return symbol < self.n_non_terminals
+
+    #Terminales de la gramatica sin '$'
+    def terminals(self):
+        return range(self.n_non_terminals, self.end)
+
+    def rule_string(self,rule):
+        head = self.symbols[self.rule_head[rule]]
+        return head+' -> '+' '.join(self.symbols[s] for s in self.rule_body[rule])
+
+    def item_tuple(self,item):
+        rule = self.item_rule[item]
+        body = tuple(self.symbols[s] for s in self.rule_body[rule])
+        return (self.symbols[self.rule_head[rule]], body, self.item_dot[item])
+
+#Cache de gramaticas compiladas por contenido
+compiled_cache = {}
+
+#Gramatica compilada (cacheada); acepta tambien una gramatica ya compilada
+def compile_grammar(grammar):
+    if isinstance(grammar, CompiledGrammar):
+        return grammar
+    key = tuple((head, tuple(bodies)) for head, bodies in grammar.items())
+    compiled = compiled_cache.get(key)
+    if compiled is None:
+        compiled = CompiledGrammar(grammar)
+        compiled_cache[key] = compiled
+    return compiled
+
 # Cerradura de un conjunto de items
 def closure(I,grammar):
-    J = I
+    grammar = compile_grammar(grammar)
+    J = set(I)
+    for item in I:
+        symbol = grammar.item_next[item]
+        if 0 <= symbol < grammar.n_non_terminals:
+            J.update(grammar.closure_items[symbol])
 
-    while True:
-        new_items = set()
-        for head, body, indice_punto in J:
-            if indice_punto < len(body):  # Verificacion de posicion del punto antes del final
-                simbolo = body[indice_punto]
-                # Si el simbolo es un no terminal, se agregan las producciones
-                if simbolo in set(grammar.keys()):
-                    for production in grammar[simbolo]:
-                        item = (simbolo, tuple(production.split(' ')), 0)  # Punto al inicio
-                        if item not in J:
-                            new_items.add(item)
-        if not new_items:
-            break  # Finalizacion cuando no hay nuevos items
-        J.update(new_items)
-
-    return J
+    return frozenset(J)
 
 # Funcion GOTO
 def goto(I,X,grammar):
-    res = set()
-    for head, body, indice_punto in I:
-        if indice_punto < len(body):  # Verificacion de posicion del punto antes del final
-            simbolo = body[indice_punto]
-            if simbolo == X:
-                res = res.union(closure({(head,body,indice_punto+1)},grammar))
-    
-    return res
+    grammar = compile_grammar(grammar)
+    kernel = [item + 1 for item in I if grammar.item_next[item] == X]
+    if not kernel:
+        return frozenset()
+    return closure(kernel,grammar)
 
 
 def getGrammarSymbols(grammar):
-    grammar_symbols = set(grammar.keys())
-
-    for value in grammar.values():
-        for prod in value:
-            grammar_symbols = grammar_symbols.union(set(prod.split(' ')))
-            
-    return grammar_symbols
+    grammar = compile_grammar(grammar)
+    return set(grammar.symbols[:grammar.end])
+
+#Kernels de los sucesores de un conjunto de items: {simbolo: kernel}
+def goto_kernels(I,grammar):
+    kernels = {}
+    for item in I:
+        symbol = grammar.item_next[item]
+        if symbol >= 0:
+            kernels.setdefault(symbol, []).append(item + 1)
+    return kernels
 
 # Generacion de automata
+#Lista de trabajo: los estados se indexan por su kernel y sus GOTO se calculan una sola vez
 def generate_LR0Automata(grammar):
-    automata  = LRAutomata()
-    
-    grammar_symbols = getGrammarSymbols(grammar)    
-    
-    simbolo = next(iter(grammar))
+    grammar = compile_grammar(grammar)
+    automata  = LRAutomata(grammar)
+
+    #Item de aceptacion: regla 0 con el punto al final
+    accept_item = grammar.item_base[0] + len(grammar.rule_body[0])
 
-    res = closure({(simbolo,tuple(grammar[simbolo][0].split(' ')),0)},grammar)
-    initial_state = LRAutomataState(automata,res)
+    kernel = frozenset({grammar.item_base[0]})
+    initial_state = LRAutomataState(automata,closure(kernel,grammar))
     automata.start = initial_state
 
-    C = {initial_state}
+    index = {kernel: initial_state}
+    pending = deque([initial_state])
     
-    while True:
-        new_states = set()
-
-        for state in C:
-            for X in grammar_symbols:
-                res = goto(state.canonicalSet,X,grammar)
-
-                if len(res)>0:
-                    if res not in [state.canonicalSet for state in C]:
-                        new_state = LRAutomataState(automata,res)
-                        new_states.add(new_state)
-                        state.transitions[X] = [new_state]
-
-                        if (simbolo,tuple(grammar[simbolo][0].split(' ')),1) in new_state.canonicalSet:
-                            new_state.is_accept = True
-                            automata.accept.add(new_state)
-                    else:
-                        for stock_state in C:
-                            if res == stock_state.canonicalSet:
-                                state.transitions[X] = [stock_state]
-
-        if not new_states:
-            break  # Finalizacion cuando no hay nuevos estados
-        C.update(new_states)
+    while pending:
+        state = pending.popleft()
+        kernels = goto_kernels(state.items,grammar)
+
+        for X in sorted(kernels):
+            kernel = frozenset(kernels[X])
+            next_state = index.get(kernel)
+            if next_state is None:
+                next_state = LRAutomataState(automata,closure(kernel,grammar))
+                index[kernel] = next_state
+                pending.append(next_state)
+
+                if accept_item in kernel:
+                    next_state.is_accept = True
+                    automata.accept.add(next_state)
+            state.transitions[grammar.symbols[X]] = [next_state]
 
     return automata
 
@@ -175,76 +266,129 @@ def plot_af(state, graph=None, visited=None):
 
     return graph
 
-def first(symbol,grammar):
-    firstSet = set()
-    
-    if symbol not in set(grammar.keys()):
-        firstSet.add(symbol)
-    elif symbol in set(grammar.keys()):
-        for prod in grammar[symbol]:
-            symbols = prod.split(' ')
-            for i in range(0,len(symbols)):
-                if symbols[i]!= symbol:
-                    res = first(symbols[i],grammar)
-                    if '' not in res:
-                        firstSet.update(res)
+#Analisis de una gramatica: anulables, FIRST y FOLLOW de todos los simbolos
+#Se calculan una sola vez por iteracion de punto fijo y se reutilizan en la tabla SLR
+#En FIRST, '' representa epsilon
+class GrammarAnalysis:
+    def __init__(self,grammar):
+        self.start = next(iter(grammar))
+        self.non_terminals = set(grammar.keys())
+
+        #Producciones como tuplas de simbolos, '' (cuerpo vacio) se omite
+        self.productions = []
+        for head, bodies in grammar.items():
+            for body in bodies:
+                self.productions.append((head, tuple(s for s in body.split(' ') if s != '')))
+
+        self.nullable = set()
+        self.firstSets = {nt: set() for nt in self.non_terminals}
+        self.followSets = {nt: set() for nt in self.non_terminals}
+
+        self.compute_first()
+        self.compute_follow()
+
+    #Anulables y FIRST por punto fijo
+    def compute_first(self):
+        changed = True
+        while changed:
+            changed = False
+            for head, body in self.productions:
+                firstSet = self.firstSets[head]
+                size = len(firstSet)
+                all_nullable = True
+                for symbol in body:
+                    if symbol in self.non_terminals:
+                        firstSet.update(self.firstSets[symbol])
+                        if symbol not in self.nullable:
+                            all_nullable = False
+                            break
+                    else:
+                        firstSet.add(symbol)
+                        all_nullable = False
                         break
-                    elif i==len(symbols)-1:
-                        firstSet.add('')
-                else:
-                    break
-    else:
+
+                if all_nullable and head not in self.nullable:
+                    self.nullable.add(head)
+                    changed = True
+                if len(firstSet) != size:
+                    changed = True
+
+        for nt in self.nullable:
+            self.firstSets[nt].add('')
+
+    #FOLLOW por punto fijo
+    def compute_follow(self):
+        self.followSets[self.start].add('$')
+
+        changed = True
+        while changed:
+            changed = False
+            for head, body in self.productions:
+                for i, symbol in enumerate(body):
+                    if symbol not in self.non_terminals:
+                        continue
+
+                    followSet = self.followSets[symbol]
+                    size = len(followSet)
+
+                    rest = self.first_string(body[i+1:])
+                    followSet.update(rest - {''})
+                    if '' in rest:
+                        followSet.update(self.followSets[head])
+
+                    if len(followSet) != size:
+                        changed = True
+
+    #FIRST de un simbolo
+    def first(self,symbol):
+        if symbol in self.non_terminals:
+            return set(self.firstSets[symbol])
+        if symbol == '':
+            return {''}
+        return {symbol}
+
+    #FIRST de una secuencia de simbolos
+    def first_string(self,symbols):
+        firstSet = set()
+        for symbol in symbols:
+            if symbol == '':
+                continue
+            if symbol not in self.non_terminals:
+                firstSet.add(symbol)
+                return firstSet
+            firstSet.update(self.firstSets[symbol] - {''})
+            if symbol not in self.nullable:
+                return firstSet
+
         firstSet.add('')
+        return firstSet
 
+    #FOLLOW de un no terminal, None si el simbolo no es no terminal
+    def follow(self,non_terminal):
+        if non_terminal not in self.non_terminals:
+            return None
+        return set(self.followSets[non_terminal])
 
-    print(firstSet)
-        
-    return firstSet
+#Cache de analisis por contenido de la gramatica
+analysis_cache = {}
+
+#Analisis (cacheado) de una gramatica
+def analyze_grammar(grammar):
+    key = tuple((head, tuple(bodies)) for head, bodies in grammar.items())
+    analysis = analysis_cache.get(key)
+    if analysis is None:
+        analysis = GrammarAnalysis(grammar)
+        analysis_cache[key] = analysis
+    return analysis
+
+def first(symbol,grammar):
+    return analyze_grammar(grammar).first(symbol)
 
 def firstString(symbols,grammar):
-    firstSet = set()
-    
-    symbols = symbols.split(' ')
-    for i in range(0,len(symbols)):
-        res = first(symbols[i],grammar)
-        if i==0 or '' not in res:
-            firstSet.update(res)
-        elif i==len(symbols)-1:
-            firstSet.add('')
-            
-    return firstSet
+    return analyze_grammar(grammar).first_string(symbols.split(' '))
 
 def follow(non_terminal,grammar):
-        if non_terminal not in set(grammar.keys()):
-            return None
-        
-        followSet = set()    
-        simbolo_inicial = next(iter(grammar))
-        
-        if non_terminal == simbolo_inicial:
-            followSet.add('$')
-            
-        for head,prods in grammar.items():
-            for prod in prods:
-                prod = prod.split(' ')
-                for i in range(0,len(prod)):
-                    if non_terminal==prod[i]:
-                        if i<len(prod)-1:
-                            firstSet = first(prod[i+1],grammar)
-                            if '' in firstSet:
-                                if head!=non_terminal:
-                                    followSet.update(follow(head,grammar))
-                                    
-                                firstSet.remove('')
-                                
-                            followSet.update(firstSet)
-                        else:
-                            if head!=non_terminal:
-                                    followSet.update(follow(head,grammar))
-                          
-            print(followSet)
-
-        return followSet
+    return analyze_grammar(grammar).follow(non_terminal)
 
 #Funcion para obtencion de no terminales
 def getNonTerminals(grammar):
@@ -252,83 +396,213 @@ def getNonTerminals(grammar):
     
     return non_terminals
 
+#Tabla de parseo LR con estados y simbolos como enteros
+#ACTION: fila por estado, columna por terminal (id del simbolo - n_non_terminals, '$' al final)
+#   0 error, j+1 desplazamiento al estado j, -(r+1) reduccion por la regla r
+#   La reduccion por la regla 0 (simbolo inicial aumentado) es la aceptacion
+#GOTO: fila por estado, columna por no terminal, -1 si no hay transicion
+class ParseTable:
+    ERROR = 0
+    ACCEPT = -1
+
+    def __init__(self,grammar,n_states):
+        self.grammar = compile_grammar(grammar)
+        self.n_states = n_states
+        self.n_non_terminals = self.grammar.n_non_terminals
+        self.n_terminals = self.grammar.end + 1 - self.n_non_terminals
+
+        self.action = array('i', [0]) * (n_states * self.n_terminals)
+        self.goto = array('i', [-1]) * (n_states * self.n_non_terminals)
+
+        #Compresion por desplazamiento de filas (ver compress)
+        self.base = None
+        self.check = None
+
+    @staticmethod
+    def shift(state):
+        return state + 1
+
+    @staticmethod
+    def reduce(rule):
+        return -(rule + 1)
+
+    #Valor ACTION de un estado y un simbolo terminal (id de la gramatica)
+    def action_at(self,state,symbol):
+        column = symbol - self.n_non_terminals
+        if self.base is None:
+            return self.action[state * self.n_terminals + column]
+        offset = self.base[state]
+        if self.check[offset + column] == offset:
+            return self.action[offset + column]
+        return 0
+
+    def set_action(self,state,symbol,value):
+        self.action[state * self.n_terminals + symbol - self.n_non_terminals] = value
+
+    def goto_at(self,state,non_terminal):
+        return self.goto[state * self.n_non_terminals + non_terminal]
+
+    def set_goto(self,state,non_terminal,value):
+        self.goto[state * self.n_non_terminals + non_terminal] = value
+
+    #Compresion de ACTION por desplazamiento de filas: cada fila distinta se coloca en el
+    #primer desplazamiento libre donde sus entradas no vacias no chocan con las ya colocadas.
+    #La busqueda se limita a n_terminals desplazamientos, si no hay lugar la fila va al final.
+    #Las filas iguales comparten desplazamiento y check guarda el desplazamiento duenio de
+    #cada posicion, por eso dos filas distintas nunca usan el mismo desplazamiento
+    def compress(self):
+        if self.base is not None:
+            return self
+
+        width = self.n_terminals
+        packed = array('i')
+        check = array('i')
+        base = array('i', [0]) * self.n_states
+        offsets = {}
+        used = set()
+        first_free = 0
+
+        rows = []
+        for state in range(self.n_states):
+            row = self.action[state * width:(state + 1) * width]
+            rows.append(tuple((column, value) for column, value in enumerate(row) if value != 0))
+
+        for state in sorted(range(self.n_states), key=lambda s: -len(rows[s])):
+            entries = rows[state]
+            offset = offsets.get(entries)
+            if offset is None:
+                offset = max(0, first_free - entries[0][0]) if entries else first_free
+                limit = offset + width
+                while offset in used or any(offset + column < len(check) and check[offset + column] != -1 for column, _ in entries):
+                    offset += 1
+                    if offset == limit:
+                        offset = len(check)
+                        break
+                if len(check) < offset + width:
+                    missing = offset + width - len(check)
+                    packed.extend([0] * missing)
+                    check.extend([-1] * missing)
+                for column, value in entries:
+                    packed[offset + column] = value
+                    check[offset + column] = offset
+                while first_free < len(check) and check[first_free] != -1:
+                    first_free += 1
+                offsets[entries] = offset
+                used.add(offset)
+            base[state] = offset
+
+        self.action = packed
+        self.check = check
+        self.base = base
+        return self
+
+    #Tabla como diccionario de diccionarios: {'I0': {'E': 'I1', '$': 'acc', 'id': 's5', '+': 'r3'}}
+    def to_dict(self):
+        grammar = self.grammar
+        parsing_table = dict()
+        for state in range(self.n_states):
+            row = dict()
+            for nt in range(1, self.n_non_terminals):
+                value = self.goto_at(state, nt)
+                row[grammar.symbols[nt]] = 'I'+str(value) if value >= 0 else None
+            for symbol in [grammar.end] + list(grammar.terminals()):
+                value = self.action_at(state, symbol)
+                if value == 0:
+                    row[grammar.symbols[symbol]] = None
+                elif value == self.ACCEPT:
+                    row[grammar.symbols[symbol]] = 'acc'
+                elif value > 0:
+                    row[grammar.symbols[symbol]] = 'sI'+str(value - 1)
+                else:
+                    row[grammar.symbols[symbol]] = 'r'+str(-value - 1)
+            parsing_table['I'+str(state)] = row
+        return parsing_table
+
 #Funcion para generacion de Tabla de Parseo SLR
 def generate_SLRTable(grammar):
-    
     automata = generate_LR0Automata(grammar)
     automata_graph = plot_af(automata.start)
     nombre_archivo_pdf = 'Automata LR'
     automata_graph.view(filename=nombre_archivo_pdf,cleanup=True)
 
-    grammar_symbols = getGrammarSymbols(grammar)
-    grammar_symbols.remove(next(iter(grammar)))
-    
-    non_terminals = getNonTerminals(grammar)
-    non_terminals.remove(next(iter(grammar)))
-    
-    terminals = grammar_symbols.difference(non_terminals)
+    return build_SLRTable(grammar,automata)
+
+#Tabla de Parseo SLR sin graficar el automata; None si la gramatica tiene conflictos
+def build_SLRTable(grammar,automata=None):
+    compiled = compile_grammar(grammar)
+    if automata is None:
+        automata = generate_LR0Automata(compiled)
+
+    return build_parse_table(automata,analyze_grammar(compiled.grammar))
+
+#Tabla de parseo sobre el automata LR(0); las reducciones usan lookahead(estado, regla)
+#(ids de terminales) o, si es None, el FOLLOW de la cabeza de la regla (SLR)
+def build_parse_table(automata,analysis=None,lookahead=None):
+    compiled = automata.grammar
+    grammar = compiled.grammar
+
+    non_terminals = [compiled.symbols[nt] for nt in range(1, compiled.n_non_terminals)]
+    terminals = [compiled.symbols[t] for t in compiled.terminals()]
     
     parsing_table = goto_transitions(automata,non_terminals)
     accept_transitions(automata,parsing_table)
     
-    if action_transitions(automata,parsing_table,terminals,grammar):
+    if action_transitions(automata,parsing_table,terminals,grammar,analysis,lookahead):
         return parsing_table
     else:
         return None
 
 #Funcion para definir los valores GOTO de la tabla SLR    
 def goto_transitions(automata,non_terminals):
-    parsing_table = dict()
+    grammar = automata.grammar
+    parsing_table = ParseTable(grammar,len(automata.states))
     
     for state in automata.states:
-        parsing_table[state.name] = dict()
         for symbol in non_terminals:
             if symbol in state.transitions:
                 nextState = state.transitions[symbol][0]
-                parsing_table[state.name][symbol] = nextState.name
-            else:
-                parsing_table[state.name][symbol] = None
+                parsing_table.set_goto(state.id,grammar.symbol_id[symbol],nextState.id)
         
     return parsing_table
 
 #Funcion para definir aceptacion
 def accept_transitions(automata,parsing_table):
-    for state in automata.states:
-        if state in automata.accept:
-            parsing_table[state.name]['$'] = "acc"
-        else:
-            parsing_table[state.name]['$'] = None
+    for state in automata.accept:
+        parsing_table.set_action(state.id,automata.grammar.end,ParseTable.ACCEPT)
 
 #Funcion para obtener las reglas de una gramatica
 def getRules(grammar):
-    rules = []
-    for head,bodies in grammar.items():
-        for body in bodies:
-            rules.append(head+' -> '+body)
-        
-    return rules
+    grammar = compile_grammar(grammar)
+    return [grammar.rule_string(rule) for rule in range(len(grammar.rule_head))]
             
 #Funcion para definir los valores ACTION de la tabla SLR
-def action_transitions(automata,parsing_table,terminals,grammar):
-    rules = getRules(grammar)
+def action_transitions(automata,parsing_table,terminals,grammar,analysis=None,lookahead=None):
+    compiled = compile_grammar(grammar)
+    if lookahead is None:
+        if analysis is None:
+            analysis = analyze_grammar(compiled.grammar)
+        follow_ids = {}
+        for head in range(compiled.n_non_terminals):
+            follow_ids[head] = [compiled.symbol_id[symbol] for symbol in analysis.follow(compiled.symbols[head])]
+        lookahead = lambda state, rule: follow_ids[compiled.rule_head[rule]]
         
     for state in automata.states:
         for symbol in terminals:
             if symbol in state.transitions:
                 nextState = state.transitions[symbol][0]
-                parsing_table[state.name][symbol] = 's'+nextState.name
-            else:
-                parsing_table[state.name][symbol] = None
+                parsing_table.set_action(state.id,compiled.symbol_id[symbol],ParseTable.shift(nextState.id))
                 
-        for head, body, indice_punto in state.canonicalSet:
-            if indice_punto==len(body) and head!=next(iter(grammar)):
-                values = follow(head,grammar)
-                index = rules.index(head+' -> '+' '.join(body))
+        for item in state.items:
+            index = compiled.item_rule[item]
+            head = compiled.rule_head[index]
+            if compiled.item_next[item]==-1 and head!=compiled.start:
+                values = lookahead(state.id,index)
                 
                 for symbol in values:
-                    if parsing_table[state.name][symbol] == None:
-                        parsing_table[state.name][symbol] = 'r'+str(index)
-                    elif parsing_table[state.name][symbol][0] == 's':
+                    value = parsing_table.action_at(state.id,symbol)
+                    if value == ParseTable.ERROR:
+                        parsing_table.set_action(state.id,symbol,ParseTable.reduce(index))
+                    elif value > 0:
                         print("ERROR: Conflicto shif-reduce en la gramatica")
                         return False
                     else:
@@ -337,8 +611,173 @@ def action_transitions(automata,parsing_table,terminals,grammar):
                     
     return True
 
+#Funcion para generacion de Tabla de Parseo LALR(1)
+def generate_LALRTable(grammar):
+    automata = generate_LR0Automata(grammar)
+    automata_graph = plot_af(automata.start)
+    nombre_archivo_pdf = 'Automata LR'
+    automata_graph.view(filename=nombre_archivo_pdf,cleanup=True)
+
+    return build_LALRTable(grammar,automata)
+
+#Tabla de Parseo LALR(1) sin graficar el automata; None si la gramatica tiene conflictos
+#Mismo automata LR(0) y mismo formato que la tabla SLR, solo cambian los lookaheads
+def build_LALRTable(grammar,automata=None):
+    compiled = compile_grammar(grammar)
+    if automata is None:
+        automata = generate_LR0Automata(compiled)
+
+    lookaheads = LALR_lookaheads(automata,analyze_grammar(compiled.grammar))
+    return build_parse_table(automata,lookahead=lambda state, rule: maskPositions(lookaheads.get((state, rule), 0)))
+
+#Ids de los bits encendidos de una mascara
+def maskPositions(mask):
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+#Lookaheads LALR(1) de DeRemer y Pennello sobre el automata LR(0)
+#Los conjuntos de terminales son mascaras de bits indexadas por id de simbolo
+#Devuelve {(id del estado, regla): mascara de lookaheads}
+def LALR_lookaheads(automata,analysis):
+    grammar = automata.grammar
+    nullable = {grammar.symbol_id[symbol] for symbol in analysis.nullable}
+
+    #Transiciones por id de estado e id de simbolo
+    transitions = {}
+    for state in automata.states:
+        transitions[state.id] = {grammar.symbol_id[symbol]: next_states[0].id for symbol, next_states in state.transitions.items()}
+    accepting = {state.id for state in automata.accept}
+
+    #Transiciones con no terminal (p, A), numeradas
+    nt_transitions = []
+    for p in sorted(transitions):
+        for symbol in sorted(transitions[p]):
+            if grammar.is_non_terminal(symbol):
+                nt_transitions.append((p, symbol))
+    index = {transition: i for i, transition in enumerate(nt_transitions)}
+
+    #DR(p, A): terminales desplazables desde goto(p, A), '$' si goto(p, A) acepta
+    #reads: (p, A) lee (r, C) si r = goto(p, A) y C es anulable
+    direct_reads = []
+    reads = []
+    for p, symbol in nt_transitions:
+        r = transitions[p][symbol]
+        mask = 0
+        related = []
+        for next_symbol in transitions[r]:
+            if not grammar.is_non_terminal(next_symbol):
+                mask |= 1 << next_symbol
+            elif next_symbol in nullable:
+                related.append(index[(r, next_symbol)])
+        if r in accepting:
+            mask |= 1 << grammar.end
+        direct_reads.append(mask)
+        reads.append(related)
+
+    read_sets = digraph(reads, direct_reads)
+
+    #includes: (p, A) incluye (p', B) si B -> beta A gamma, gamma anulable y p' --beta--> p
+    #lookback: (q, B -> omega) mira hacia atras a (p', B) si p' --omega--> q
+    includes = [[] for _ in nt_transitions]
+    lookback = {}
+    for i, (p, head) in enumerate(nt_transitions):
+        for rule in grammar.rules_of[head]:
+            body = grammar.rule_body[rule]
+            path = [p]
+            for symbol in body:
+                path.append(transitions[path[-1]][symbol])
+            for position in range(len(body) - 1, -1, -1):
+                symbol = body[position]
+                if grammar.is_non_terminal(symbol):
+                    includes[index[(path[position], symbol)]].append(i)
+                if symbol not in nullable:
+                    break
+            lookback.setdefault((path[-1], rule), []).append(i)
+
+    follow_sets = digraph(includes, read_sets)
+
+    lookaheads = {}
+    for key, related in lookback.items():
+        mask = 0
+        for i in related:
+            mask |= follow_sets[i]
+        lookaheads[key] = mask
+    return lookaheads
+
+#Algoritmo digraph de DeRemer y Pennello: F(x) = F'(x) U {F(y) | x R y}
+#Recorrido en profundidad iterativo; los nodos de una misma componente fuerte comparten F
+def digraph(relation, initial):
+    infinity = len(relation) + 1
+    depth = [0] * len(relation)
+    values = list(initial)
+    stack = []
+
+    for root in range(len(relation)):
+        if depth[root]:
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        work = [(root, iter(relation[root]), len(stack))]
+        while work:
+            x, successors, d = work[-1]
+            for y in successors:
+                if depth[y] == 0:
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    work.append((y, iter(relation[y]), len(stack)))
+                    break
+                depth[x] = min(depth[x], depth[y])
+                values[x] |= values[y]
+            else:
+                work.pop()
+                if depth[x] == d:
+                    while True:
+                        top = stack.pop()
+                        depth[top] = infinity
+                        values[top] = values[x]
+                        if top == x:
+                            break
+                if work:
+                    parent = work[-1][0]
+                    depth[parent] = min(depth[parent], depth[x])
+                    values[parent] |= values[x]
+    return values
+
+#Constructores de tablas por metodo
+TABLE_BUILDERS = {
+    'SLR': build_SLRTable,
+    'LALR': build_LALRTable,
+}
+
+#Tabla de parseo desde la cache en disco (cacheLib), con la gramatica y el metodo como llave
+#Si no esta se construye el automata una sola vez (graficandolo con plot=True) y se guarda;
+#las gramaticas con conflictos no se guardan, para que el error se reporte en cada corrida
+def cached_parse_table(grammar,method='SLR',plot=False):
+    compiled = compile_grammar(grammar)
+    key = cacheLib.spec_key('parser-'+method, tuple((head, tuple(bodies)) for head, bodies in compiled.grammar.items()))
+    parsing_table = cacheLib.load(key)
+    if parsing_table is not None:
+        return parsing_table
+
+    automata = generate_LR0Automata(compiled)
+    if plot:
+        automata_graph = plot_af(automata.start)
+        nombre_archivo_pdf = 'Automata LR'
+        automata_graph.view(filename=nombre_archivo_pdf,cleanup=True)
+
+    parsing_table = TABLE_BUILDERS[method](compiled,automata)
+    if parsing_table is not None:
+        cacheLib.store(key, parsing_table)
+    return parsing_table
+
 #Funcion para impresion de la tabla de parseo SLR
 def print_parsing_table(parsing_table):
+    if isinstance(parsing_table, ParseTable):
+        parsing_table = parsing_table.to_dict()
     # Crear los encabezados de la tabla extrayendo las llaves de cualquier estado (elegimos el estado 0 como ejemplo)
     headers = ["State"] + list(parsing_table['I0'].keys())
     # Preparar las filas de la tabla incluyendo el numero de estado
@@ -350,36 +789,58 @@ def print_parsing_table(parsing_table):
     print(tabulate(table, headers=headers, tablefmt="grid"))
     
 
+#Fuente de tokens bajo demanda: vacia una cola (Fifo) o recorre cualquier iterable
+#de nombres de token y termina con '$'
+def token_source(input_value):
+    if isinstance(input_value, Queue):
+        while not input_value.empty():
+            yield input_value.remove_first()
+    else:
+        yield from input_value
+    yield '$'
+
 #Algoritmo de Parseo LR
-def LRParsing(grammar,parsing_table,input_value):
-    stack = Stack()
-    stack.insert('I0')
-    symbols = ""
-    input_value.insert('$')
-    
-    rules = getRules(grammar)
+#La gramatica es la de la tabla (parsing_table.grammar); un indice en ACTION por token y los tokens
+#que no son terminales de esa gramatica se reportan como error
+#La pila de estados es una lista (append/pop) y los tokens se piden uno a uno
+def LRParsing(parsing_table,input_value):
+    grammar = parsing_table.grammar
+    symbol_id = grammar.symbol_id
+    n_non_terminals = grammar.n_non_terminals
+    rule_head = grammar.rule_head
+    rule_length = [len(body) for body in grammar.rule_body]
+    action_at = parsing_table.action_at
+    goto_at = parsing_table.goto_at
+
+    tokens = token_source(input_value)
+    stack = [0]
+    token = next(tokens)
+    symbol = symbol_id.get(token, -1)
     
     while True:
-        action = parsing_table[stack.first()][input_value.first()]
-        if action==None:
+        if symbol < n_non_terminals:
+            print(f"ERROR: el token '{token}' no es un terminal de la gramatica")
+            action = ParseTable.ERROR
+        else:
+            action = action_at(stack[-1],symbol)
+
+        if action==ParseTable.ERROR:
             print("ERROR SINTACTICO. CADENA NO ACEPTADA")
-            break;
-        elif action[0]=='s':
-            stack.insert(action[1:])
-            symbols=input_value.remove_first()
-        elif action[0]=='r':
-            prod = rules[int(action[1])].split(' -> ')
-            head = prod[0]
-            body = prod[1].split(' ')
-            
-            for i in range(len(body)):
-                stack.remove_first()
-            
-            stack.insert(parsing_table[stack.first()][head])
-            symbols=head
-        elif action=="acc":
+            return False
+        elif action>0:
+            stack.append(action-1)
+            token = next(tokens)
+            symbol = symbol_id.get(token, -1)
+        elif action==ParseTable.ACCEPT:
             print("-- CADENA ACEPTADA --")
-            break;
+            return True
+        else:
+            rule = -action-1
+            length = rule_length[rule]
+            if length:
+                del stack[-length:]
+            
+            stack.append(goto_at(stack[-1],rule_head[rule]))
 
 
 # Definir la interfaz
@@ -401,9 +862,10 @@ class QueueInterface(ABC):
         pass
 
 # Clase Padre que implementa la interfaz
+#El contenido es un deque: insertar y quitar en cualquiera de los extremos es O(1)
 class Queue(QueueInterface):
     def __init__(self):
-       self.content = []         
+       self.content = deque()
 
     def empty(self):
         return len(self.content)==0
@@ -413,10 +875,8 @@ class Queue(QueueInterface):
             return self.content[0]
         
     def remove_first(self):
-        item = self.first()
-        if item:
-            self.content.pop(0)
-            return item
+        if not self.empty():
+            return self.content.popleft()
         
     def insert(self,item):
         pass
@@ -430,5 +890,5 @@ class Fifo(Queue):
 #Clase Hija LIFO
 class Stack(Queue):
     def insert(self,item):
-        self.content.insert(0,item)
+        self.content.appendleft(item)
         return self.content
\ No newline at end of file
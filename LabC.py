@@ -8,6 +8,8 @@ import AfdLib
 import AfLib
 import pickle
 import traceback
+import cacheLib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 
 def eliminar_comentarios_yalex(contenido):
@@ -382,24 +384,150 @@ def convertir_reglas_a_diccionario(reglas):
 
 
 
-def generate_scan(path, doc):
-    try:    
-        with open(path, 'r', encoding='utf-8') as archivo:
-            contenido_archivo = archivo.read()
-
-        contenido_sin_comentarios = eliminar_comentarios_yalex(contenido_archivo)
-        contenido_sin_comentarios, header = extraer_header_y_contenido(contenido_sin_comentarios)
-        contenido_sin_comentarios, footer = extraer_footer_y_contenido(contenido_sin_comentarios)
-        definiciones, reglas = normalizar_y_separar(contenido_sin_comentarios)
-        diccionario_definiciones = definiciones_a_diccionario(definiciones)
-        diccionario_reglas = reglas_a_diccionario(reglas)
-        diccionario_explotado = explotar_valores(diccionario_definiciones)
-        
+def leer_especificacion(path):
+    """
+    Lee un archivo YALex y obtiene la expresion regular de cada regla, ya con las
+    definiciones sustituidas.
+
+    Args:
+    - path (str): Ruta del archivo YALex.
+
+    Returns:
+    - tuple: (header, footer, diccionario_explotado, diccionario_reglas, valores_para_unir).
+      'valores_para_unir' tiene la expresion de cada regla en el orden de 'diccionario_reglas'.
+    """
+    with open(path, 'r', encoding='utf-8') as archivo:
+        contenido_archivo = archivo.read()
+
+    contenido_sin_comentarios = eliminar_comentarios_yalex(contenido_archivo)
+    contenido_sin_comentarios, header = extraer_header_y_contenido(contenido_sin_comentarios)
+    contenido_sin_comentarios, footer = extraer_footer_y_contenido(contenido_sin_comentarios)
+    definiciones, reglas = normalizar_y_separar(contenido_sin_comentarios)
+    diccionario_definiciones = definiciones_a_diccionario(definiciones)
+    diccionario_reglas = reglas_a_diccionario(reglas)
+    diccionario_explotado = explotar_valores(diccionario_definiciones)
+
+    diccionario_de_reglas = convertir_reglas_a_diccionario(reglas)
+    
+    valores_para_unir = []
+    for clave in diccionario_de_reglas.keys():
+        if clave in diccionario_explotado:
+            valor = diccionario_explotado[clave]
+        else:
+            valor = clave
+        # Verifica si el valor contiene '.', si es así, encierra '.' con comillas simples
+        valor_modificado = valor.replace('.', "'.'")
+        valores_para_unir.append(valor_modificado)
+
+    return header, footer, diccionario_explotado, diccionario_reglas, valores_para_unir
+
+
+def build_scanner(path, verbose=False, cache=False):
+    """
+    Construye el AFD minimizado de un archivo YALex, con sus acciones compiladas, sin escribir
+    archivos. Cada llamada usa sus propias tablas de posiciones (astLib.AST), por lo que se
+    pueden construir varios scanners en paralelo.
+
+    Con cache=True el resultado se busca primero en la cache de cacheLib, con la especificacion
+    ya procesada (sin comentarios ni espacios) como llave.
+
+    Args:
+    - path (str): Ruta del archivo YALex.
+    - verbose (bool): Imprime las definiciones y reglas procesadas.
+    - cache (bool): Usa la cache en disco de AFDs compilados.
+
+    Returns:
+    - tuple: (afd, header, footer).
+    """
+    especificacion = leer_especificacion(path)
+    header, footer, diccionario_explotado, diccionario_reglas, valores_para_unir = especificacion
+    
+    if verbose:
         print("-----------------------------------------------------")
         for clave, valor in diccionario_explotado.items():
             print(f"{clave}: {valor}")
         print("-----------------------------------------------------")
-        
+
+    if cache:
+        key = cacheLib.spec_key('scanner', especificacion)
+        cached = cacheLib.load(key)
+        if cached is not None:
+            if verbose:
+                print("AFD cargado de la cache")
+            return cached
+
+    # arbol_no = 0
+    # for item in valores_para_unir:
+    #     arbol_no=arbol_no+1
+    #     postfix = regexLib.shunting_yard(item)
+    #     ast = astLib.create_ast(postfix)
+    #     ast_graph = astLib.plot_tree(ast)
+    #     nombre = "arbol" + str(arbol_no)
+    #     ast_graph.view(filename=nombre, cleanup=True)
+
+    valores_para_unir = [item + '■' for item in valores_para_unir]
+    resultado = '|'.join(valores_para_unir)
+    resultado = '('+resultado+')'
+
+    if verbose:
+        for clave, valor in diccionario_reglas.items():
+            print(f"{clave}: {valor}")
+
+    # postfixCompleto = regexLib.shunting_yard(resultado)            
+    # ast_complete = astLib.create_ast(postfixCompleto)
+    # ast_graph_complete = astLib.plot_tree(ast_complete)
+    # nombre = "arbol completo"
+    # ast_graph_complete.view(filename=nombre, cleanup=True)
+
+    postfix = regexLib.shunting_yard(resultado)
+    ast = astLib.create_ast(postfix)
+    alphabet = regexLib.regexAlphabet(postfix)
+    afd = AfdLib.ast_to_afdd(alphabet,ast)
+
+    #Cada '■' marca el final de una regla, en el mismo orden que diccionario_reglas
+    acceptPositions = astLib.maskPositions(ast.posTable['■'])
+    nombres_reglas = list(diccionario_reglas.keys())
+    acciones = list(diccionario_reglas.values())
+
+    #Compilacion de las acciones una sola vez, los errores se reportan con el nombre de la regla
+    afd.action_table = AfdLib.ActionTable()
+    for indice, acceptPos in enumerate(acceptPositions):
+        afd.action_table.add(acceptPos, nombres_reglas[indice], acciones[indice][2:-1])
+
+    for state in afd.accept:
+            state.action = acciones[acceptPositions.index(state.acceptPos)]
+
+    #Minimizacion (Hopcroft), los estados de reglas distintas no se combinan
+    afd = AfdLib.afd_to_afdmin(alphabet,afd)
+    # afd_graph = AfLib.plot_af(afd.start)
+    # afd_graph.view(filename='AFD',cleanup=True)
+
+    if cache:
+        cacheLib.store(key, (afd, header, footer))
+
+    return afd, header, footer
+
+
+def build_scanners(paths, max_workers=None, processes=False):
+    """
+    Construye varios scanners en paralelo con un pool de hilos o de procesos.
+
+    Args:
+    - paths (List[str]): Rutas de los archivos YALex.
+    - max_workers (int): Numero maximo de trabajadores del pool.
+    - processes (bool): Usa ProcessPoolExecutor en lugar de ThreadPoolExecutor.
+
+    Returns:
+    - List[tuple]: Resultado de build_scanner para cada ruta, en el mismo orden.
+    """
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=max_workers) as executor:
+        return list(executor.map(build_scanner, paths))
+
+
+def generate_scan(path, doc):
+    try:    
+        afd, header, footer = build_scanner(path, verbose=True, cache=True)
 
         #LEER YAL
         
@@ -413,55 +541,8 @@ def generate_scan(path, doc):
         with open('tokens.pkl', 'wb') as archivo_tokens:
             pickle.dump(tokens, archivo_tokens)
 
-
-        diccionario_de_reglas = convertir_reglas_a_diccionario(reglas)
-        
-        claves = list(diccionario_de_reglas.keys())
-        valores_para_unir = []
-        for clave in diccionario_de_reglas.keys():
-            if clave in diccionario_explotado:
-                valor = diccionario_explotado[clave]
-            else:
-                valor = clave
-            # Verifica si el valor contiene '.', si es así, encierra '.' con comillas simples
-            valor_modificado = valor.replace('.', "'.'")
-            valores_para_unir.append(valor_modificado)
-
-        # arbol_no = 0
-        # for item in valores_para_unir:
-        #     arbol_no=arbol_no+1
-        #     postfix = regexLib.shunting_yard(item)
-        #     ast_root = astLib.create_ast(postfix)
-        #     ast_graph = astLib.plot_tree(ast_root)
-        #     nombre = "arbol" + str(arbol_no)
-        #     ast_graph.view(filename=nombre, cleanup=True)
-
-        valores_para_unir = [item + '■' for item in valores_para_unir]
-        resultado = '|'.join(valores_para_unir)
-        resultado = '('+resultado+')'
-
-        for clave, valor in diccionario_reglas.items():
-            print(f"{clave}: {valor}")
-
-        # postfixCompleto = regexLib.shunting_yard(resultado)            
-        # ast_root_complete = astLib.create_ast(postfixCompleto)
-        # ast_graph_complete = astLib.plot_tree(ast_root_complete)
-        # nombre = "arbol completo"
-        # ast_graph_complete.view(filename=nombre, cleanup=True)
-
-        postfix = regexLib.shunting_yard(resultado)
-        ast_root = astLib.create_ast(postfix)
-        afd = AfdLib.ast_to_afdd(regexLib.regexAlphabet(postfix),ast_root)
-        uniquePos = sorted(list(set(state.acceptPos for state in afd.accept)))
-        for state in afd.accept:
-                state.action = list(diccionario_reglas.values())[uniquePos.index(state.acceptPos)]
-        # afd_graph = AfLib.plot_af(afd.start)
-        # afd_graph.view(filename='AFD',cleanup=True)
-        
-        
-
-        with open(f"afd_{doc}.pkl", 'wb') as archivo_salida:
-            pickle.dump(afd, archivo_salida)
+        #Tabla binaria del AFD (AfdLib.load_table la abre con mmap)
+        AfdLib.dump_table(afd, f"afd_{doc}.tbl")
             
         with open(f"header.pkl", 'wb') as archivo_salida_header:
             pickle.dump(header, archivo_salida_header)
@@ -1,21 +1,41 @@
 ﻿# -*- coding: utf-8 -*-﻿
 import LR0
+import AfdLib
+import pipeline
 import pickle
-
-
-
-with open('grammar.pkl', 'rb') as archivo_entrada:
-        grammar = pickle.load(archivo_entrada)
-        
-with open('compare_tokens.pkl', 'rb') as archivo_entrada:
-        compare_tokens = pickle.load(archivo_entrada)
+import sys
+
+#Metodo de construccion de la tabla y archivo de tokens: python LabE.py [SLR|LALR] [--pkl[=ruta]]
+argumentos = [argumento for argumento in sys.argv[1:] if not argumento.startswith('--')]
+table_method = argumentos[0].upper() if argumentos else 'SLR'
+
+#Por defecto el scanner alimenta al parser en el mismo proceso (pipeline.ParsePipeline);
+#con --pkl se leen los pkl escritos por Scan.py y ScanYal.py y los tokens de la ruta indicada
+#(input_tokens.pkl si no se indica): .pkl de BufferedTokenSink o .jsonl de StreamTokenSink
+tokens_path = None
+for argumento in sys.argv[1:]:
+    if argumento == '--pkl' or argumento.startswith('--pkl='):
+        tokens_path = argumento.partition('=')[2] or 'input_tokens.pkl'
+USE_PKL = tokens_path is not None
+
+
+if USE_PKL:
+    with open('grammar.pkl', 'rb') as archivo_entrada:
+            grammar = pickle.load(archivo_entrada)
+            
+    with open('compare_tokens.pkl', 'rb') as archivo_entrada:
+            compare_tokens = pickle.load(archivo_entrada)
+            
+    with open('ignore_tokens.pkl', 'rb') as archivo_entrada:
+            ignore_tokens = pickle.load(archivo_entrada)
+else:
+    #Las acciones del scanner del .yalp llenan la especificacion en memoria
+    with open('conflicto.yalp', 'r', encoding='utf-8') as archivo_entrada:
+        spec = AfdLib.load_spec(AfdLib.load_table('afd_YAPARYAL.tbl'), archivo_entrada.read())
+    grammar = spec.grammar
+    compare_tokens = spec.compare_tokens
+    ignore_tokens = spec.ignore_tokens
         
-with open('ignore_tokens.pkl', 'rb') as archivo_entrada:
-        ignore_tokens = pickle.load(archivo_entrada)
-        
-with open('input_tokens.pkl', 'rb') as archivo_entrada:
-        input_tokens = pickle.load(archivo_entrada)
-
 
 print("Grammar: " + str(grammar))
 print("--------------------------------------------------------------------------------")
@@ -23,31 +43,26 @@ print("compare_tokens: " + str(compare_tokens))
 print("--------------------------------------------------------------------------------")
 print("ignore_tokens: " + str(ignore_tokens))
 print("--------------------------------------------------------------------------------")
-print("input_tokens: " + str(input_tokens))
-
-
-cleaned_tokens = [token for token in input_tokens if token not in ignore_tokens]
-
-print(cleaned_tokens)
-
-grammar = LR0.augment_grammar(grammar)
-
-automata = LR0.generate_LR0Automata(grammar)
-automata_graph = LR0.plot_af(automata.start)
-nombre_archivo_pdf = 'Automata LR'
-automata_graph.view(filename=nombre_archivo_pdf,cleanup=True)
-
-
-grammar = LR0.augment_grammar(grammar)
-input_value = LR0.Fifo()
-
-for item in cleaned_tokens:
-    input_value.insert(item)
 
-parsing_table = LR0.generate_SLRTable(grammar)
-if parsing_table:
-    LR0.print_parsing_table(parsing_table)
-    LR0.LRParsing(grammar,parsing_table,input_value)
+if USE_PKL:
+    #Los tokens se leen a medida que LRParsing los pide, descartando los ignorados
+    ignore_set = set(ignore_tokens)
+    input_value = (item for item in AfdLib.read_tokens(tokens_path) if item not in ignore_set)
+
+    grammar = LR0.augment_grammar(grammar)
+
+    #El automata y la tabla se construyen una sola vez y se guardan en la cache de tablas
+    parsing_table = LR0.cached_parse_table(grammar,table_method,plot=True)
+    if parsing_table:
+        LR0.print_parsing_table(parsing_table)
+        LR0.LRParsing(parsing_table,input_value)
+else:
+    parser_pipeline = pipeline.ParsePipeline(AfdLib.load_table('afd_YAL.tbl'), spec, table_method, plot=True)
+    if parser_pipeline.parsing_table:
+        #Los tokens de entrada1.txt se generan a medida que LRParsing los pide
+        LR0.print_parsing_table(parser_pipeline.parsing_table)
+        with open('entrada1.txt', 'r', encoding='utf-8') as archivo_entrada:
+            parser_pipeline.parse(archivo_entrada)
 
 
 # with open('compare_tokens.pkl', 'rb') as archivo_entrada_compare_tokens:
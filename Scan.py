@@ -7,9 +7,8 @@ print("header")
 
             
 if __name__ == "__main__":
-    #Lectura del objeto pkl
-    with open('afd_YAPARYAL.pkl', 'rb') as archivo_entrada:
-        afd = pickle.load(archivo_entrada)
+    #Tabla binaria del AFD, mapeada en memoria sin reconstruir objetos
+    afd = AfdLib.load_table('afd_YAPARYAL.tbl')
             
     #Lectura del documento txt
     with open('conflicto.yalp', 'r', encoding='utf-8') as file:
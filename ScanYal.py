@@ -7,19 +7,16 @@ grammar = dict()
 
             
 if __name__ == "__main__":
-    #Lectura del objeto pkl
-    with open('afd_YAL.pkl', 'rb') as archivo_entrada:
-        afd = pickle.load(archivo_entrada)
+    #Tabla binaria del AFD, mapeada en memoria sin reconstruir objetos
+    afd = AfdLib.load_table('afd_YAL.tbl')
     
-    input_tokens = []
-    with open('input_tokens.pkl', 'wb') as archivo_input_tokens:
-            pickle.dump(input_tokens, archivo_input_tokens)
-        
     #Lectura del documento txt
     with open('entrada1.txt', 'r', encoding='utf-8') as file:
         txtContent = file.read()  # Leer todo el contenido del archivo
-        
-    AfdLib.tokensRecognizeYAL(afd,txtContent)
+
+    #Los tokens se acumulan en memoria y se escriben una sola vez en input_tokens.pkl
+    with AfdLib.BufferedTokenSink('input_tokens.pkl') as sink:
+        AfdLib.tokensRecognizeYAL(afd,txtContent,sink)
     
 
 print("trailer")
@@ -1,26 +1,50 @@
 ﻿# -*- coding: utf-8 -*-
 from graphviz import Digraph
+from regexLib import CharSet
 
 class Node:
-    pos_counter = 0
-    followPosTable = dict()
-    posTable = dict()
-    
     def __init__(self, value, left=None, right=None, pos=None, nullable=None):
         self.value = value
         self.left = left
         self.right = right
         self.pos = pos
         self.nullable = nullable
-        self.firstPos = set()
-        self.lastPos = set()
+        #Conjuntos de posiciones como mascara de bits: el bit i representa la posicion i
+        self.firstPos = 0
+        self.lastPos = 0
+
+#Posiciones (bits encendidos) de una mascara, en orden ascendente
+def maskPositions(mask):
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
         
+#Resultado de create_ast: raiz y tablas de posiciones propias de cada instancia
+class AST:
+    def __init__(self, root, posTable, followPos):
+        self.root = root
+        #Hoja (caracter o CharSet) -> mascara de posiciones
+        self.posTable = posTable
+        #Siguiente Pos indexada por posicion (followPos[0] sin uso): mascara de posiciones
+        self.followPos = followPos
+
+    @property
+    def pos_counter(self):
+        return len(self.followPos) - 1
+
+    @property
+    def firstPos(self):
+        return self.root.firstPos
+
 def create_ast(postfix):
     stack = []
     operators = ['|','*','.']
-    Node.pos_counter = 0
-    Node.followPosTable = dict()
-    Node.posTable = dict()
+    pos_counter = 0
+    followPosTable = [0]
+    posTable = dict()
 
     j=0
     while j<len(postfix):
@@ -31,24 +55,20 @@ def create_ast(postfix):
             if char=='ε':
                 new_node.nullable = True
             else:
-                if char[0]=='\\' and len(char)>1:
+                if isinstance(char, str) and char[0]=='\\' and len(char)>1:
                     char = char[1]
                     new_node.value = char
                         
-                Node.pos_counter+=1
-                new_node.pos = Node.pos_counter
-                Node.followPosTable[new_node.pos] = set()
+                pos_counter+=1
+                new_node.pos = pos_counter
+                followPosTable.append(0)
                 
-                if char in Node.posTable:
-                    Node.posTable[char].add(new_node.pos)
-                else:
-                    Node.posTable[char] = set()
-                    Node.posTable[char].add(new_node.pos)
+                posTable[char] = posTable.get(char, 0) | (1 << new_node.pos)
                 
                 #Nulidad, Primera Pos y Ultima Pos
                 new_node.nullable = False
-                new_node.firstPos.add(new_node.pos)
-                new_node.lastPos.add(new_node.pos)
+                new_node.firstPos = 1 << new_node.pos
+                new_node.lastPos = 1 << new_node.pos
                 
         else:  # si es un operador, se crea un nuevo nodo y se conecta con dos nodos anteriores
             new_node.right = stack.pop()  # el segundo nodo se convierte en el hijo derecho
@@ -59,27 +79,27 @@ def create_ast(postfix):
             if char=='|':
                 #Nulidad, Primera Pos y Ultima Pos
                 new_node.nullable = new_node.left.nullable or new_node.right.nullable
-                new_node.firstPos = new_node.left.firstPos.union(new_node.right.firstPos)
-                new_node.lastPos = new_node.left.lastPos.union(new_node.right.lastPos)
+                new_node.firstPos = new_node.left.firstPos | new_node.right.firstPos
+                new_node.lastPos = new_node.left.lastPos | new_node.right.lastPos
             elif char=='.':
                 #Nulidad
                 new_node.nullable = new_node.left.nullable and new_node.right.nullable
                 
                 #Primera Pos
                 if new_node.left.nullable:
-                    new_node.firstPos = new_node.left.firstPos.union(new_node.right.firstPos)
+                    new_node.firstPos = new_node.left.firstPos | new_node.right.firstPos
                 else:
                     new_node.firstPos = new_node.left.firstPos
                     
                 #Ultima Pos
                 if new_node.right.nullable:
-                    new_node.lastPos = new_node.left.lastPos.union(new_node.right.lastPos)
+                    new_node.lastPos = new_node.left.lastPos | new_node.right.lastPos
                 else:
                     new_node.lastPos = new_node.right.lastPos
                  
                 #Siguiente Pos
-                for i in new_node.left.lastPos:
-                    Node.followPosTable[i].update(new_node.right.firstPos)
+                for i in maskPositions(new_node.left.lastPos):
+                    followPosTable[i] |= new_node.right.firstPos
                     
             else:
                 #Nulidad, Primera Pos y Ultima Pos
@@ -88,24 +108,41 @@ def create_ast(postfix):
                 new_node.lastPos = new_node.right.lastPos
                 
                 #Siguiente Pos
-                for i in new_node.lastPos:
-                    Node.followPosTable[i].update(new_node.firstPos)
+                for i in maskPositions(new_node.lastPos):
+                    followPosTable[i] |= new_node.firstPos
         
         j+=1
         stack.append(new_node)
     
-    return stack[0] if stack else None  # el último nodo en la pila es la raíz del AST
+    root = stack[0] if stack else None  # el último nodo en la pila es la raíz del AST
+    return AST(root, posTable, followPosTable)
+
+#Mascara de posiciones de cada simbolo del alfabeto particionado (regexLib.partitionAlphabet)
+#Una clase pertenece completa o no pertenece a cada hoja, basta revisar su primer caracter
+def symbolPositions(alphabet, posTable):
+    positions = {}
+    for symbol in alphabet:
+        probe = symbol if isinstance(symbol, str) else chr(symbol.ranges[0][0])
+        res = 0
+        for leaf, leafPositions in posTable.items():
+            if (leaf == probe) if isinstance(leaf, str) else (probe in leaf):
+                res |= leafPositions
+        positions[symbol] = res
+
+    return positions
 
 def plot_tree(root, graph=None):
+    if isinstance(root, AST):
+        root = root.root
     if graph is None:
         graph = Digraph()
-        graph.node(name=str(id(root)), label=root.value)
+        graph.node(name=str(id(root)), label=str(root.value))
     if root.left:  # si el nodo izquierdo existe, se agrega al gráfico y se conecta con la raíz
-        graph.node(name=str(id(root.left)), label=root.left.value)
+        graph.node(name=str(id(root.left)), label=str(root.left.value))
         graph.edge(str(id(root)), str(id(root.left)))
         plot_tree(root.left, graph)
     if root.right:  # si el nodo derecho existe, se agrega al gráfico y se conecta con la raíz
-        graph.node(name=str(id(root.right)), label=root.right.value)
+        graph.node(name=str(id(root.right)), label=str(root.right.value))
         graph.edge(str(id(root)), str(id(root.right)))
         plot_tree(root.right, graph)
     return graph
\ No newline at end of file
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+# Benchmarks de construccion de lexers
+# Uso: python benchmark.py [nombre]
+import sys
+import time
+import string
+import re
+import contextlib
+import io
+import os
+import tempfile
+from array import array
+from itertools import chain
+
+import regexLib
+import astLib
+import AfdLib
+import LabC
+import LR0
+
+
+#Palabra clave sintetica para la regla i: kw + indice en base 26
+def synthetic_keyword(i):
+    letras = ''
+    while True:
+        letras = string.ascii_lowercase[i % 26] + letras
+        i //= 26
+        if i == 0:
+            break
+    return 'kw' + letras
+
+#Reglas sinteticas: n palabras clave, identificadores y espacios en blanco
+def synthetic_rules(n):
+    reglas = ['"' + synthetic_keyword(i) + '"' for i in range(n)]
+    reglas.append("['a'-'z']['a'-'z''0'-'9']*")
+    reglas.append("[' ''\\t''\\n']+")
+    return reglas
+
+#Expresion combinada de las reglas, igual que en LabC.generate_scan
+def combined_regex(reglas):
+    return '(' + '|'.join(regla + '■' for regla in reglas) + ')'
+
+#Construccion AST -> AFD directo de una expresion combinada
+def build_afd(resultado):
+    postfix = regexLib.shunting_yard(resultado)
+    ast = astLib.create_ast(postfix)
+    return AfdLib.ast_to_afdd(regexLib.regexAlphabet(postfix),ast)
+
+def timed(function, *args):
+    inicio = time.perf_counter()
+    res = function(*args)
+    return res, time.perf_counter() - inicio
+
+#Tiempo de construccion del AFD contra numero de reglas
+def bench_afd_construction(rule_counts=(50, 100, 200, 400, 800, 1600)):
+    print(f"{'reglas':>8} {'estados':>8} {'segundos':>10}")
+    for n in rule_counts:
+        afd, segundos = timed(build_afd, combined_regex(synthetic_rules(n)))
+        print(f"{n:>8} {len(afd.states):>8} {segundos:>10.4f}")
+
+#Minimizacion: Hopcroft (por defecto) contra Moore (verificacion cruzada)
+#Moore solo distingue aceptacion/no aceptacion, por eso puede dejar menos estados que Hopcroft
+def bench_minimization(rule_counts=(25, 50, 100, 200)):
+    print(f"{'reglas':>8} {'estados':>8} {'hopcroft':>9} {'seg':>8} {'moore':>6} {'seg':>8}")
+    for n in rule_counts:
+        resultado = combined_regex(synthetic_rules(n))
+        alphabet = regexLib.regexAlphabet(regexLib.shunting_yard(resultado))
+        afd = build_afd(resultado)
+        hopcroft, seg_hopcroft = timed(AfdLib.afd_to_afdmin, alphabet, afd)
+        moore, seg_moore = timed(AfdLib.afd_to_afdmin_moore, alphabet, afd)
+        print(f"{n:>8} {len(afd.states):>8} {len(hopcroft.states):>9} {seg_hopcroft:>8.4f} {len(moore.states):>6} {seg_moore:>8.4f}")
+
+#Costo de construccion contra el ancho de las clases de caracteres (intervalos, sin expandir)
+def bench_char_classes(widths=(26, 1000, 20000, 60000)):
+    print(f"{'ancho':>8} {'hojas':>6} {'estados':>8} {'segundos':>10}")
+    for width in widths:
+        fin = chr(ord('a') + width - 1)
+        resultado = combined_regex(["['a'-'" + fin + "']['a'-'" + fin + "''0'-'9']*", "['0'-'9']+"])
+        hojas = astLib.create_ast(regexLib.shunting_yard(resultado)).pos_counter
+        afd, segundos = timed(build_afd, resultado)
+        print(f"{width:>8} {hojas:>6} {len(afd.states):>8} {segundos:>10.4f}")
+
+#Construccion AST -> AFD (mascaras de bits) sobre las especificaciones del repositorio,
+#escaladas replicando sus reglas k veces
+def bench_bitsets(specs=('slr-1.yal', 'slr-3.yal', 'slr-4.yal', 'yalex.yal'), factors=(1, 4, 16, 64)):
+    print(f"{'spec':>10} {'k':>4} {'reglas':>7} {'posiciones':>10} {'estados':>8} {'ast':>8} {'afd':>8}")
+    for spec in specs:
+        valores = LabC.leer_especificacion(spec)[4]
+        for k in factors:
+            postfix = regexLib.shunting_yard(combined_regex(valores * k))
+            ast, seg_ast = timed(astLib.create_ast, postfix)
+            afd, seg_afd = timed(AfdLib.ast_to_afdd, regexLib.regexAlphabet(postfix), ast)
+            print(f"{spec:>10} {k:>4} {len(valores)*k:>7} {ast.pos_counter:>10} {len(afd.states):>8} {seg_ast:>8.4f} {seg_afd:>8.4f}")
+
+#Gramatica sintetica de expresiones con niveles de precedencia:
+#E_i -> E_i op_i E_i+1 | E_i+1 y el ultimo nivel -> ( E_0 ) | id | num
+#Tiene 2*niveles + 3 producciones
+def synthetic_grammar(levels):
+    grammar = {}
+    for i in range(levels):
+        grammar['E'+str(i)] = ['E'+str(i)+' op'+str(i)+' E'+str(i+1), 'E'+str(i+1)]
+    grammar['E'+str(levels)] = ['lparen E0 rparen', 'id', 'num']
+    return LR0.augment_grammar(grammar)
+
+#Construccion del automata LR(0) contra numero de producciones
+def bench_lr0_automata(production_counts=(50, 100, 250, 500, 1000, 2000)):
+    print(f"{'producciones':>12} {'estados':>8} {'segundos':>10}")
+    for n in production_counts:
+        grammar = synthetic_grammar((n - 3) // 2)
+        automata, segundos = timed(LR0.generate_LR0Automata, grammar)
+        print(f"{n:>12} {len(automata.states):>8} {segundos:>10.4f}")
+
+#Tamanio de la tabla SLR densa contra la comprimida por desplazamiento de filas
+def bench_parse_table(production_counts=(50, 250, 1000, 2000)):
+    print(f"{'producciones':>12} {'estados':>8} {'densa':>9} {'comprimida':>10} {'segundos':>10}")
+    for n in production_counts:
+        table = LR0.build_SLRTable(synthetic_grammar((n - 3) // 2))
+        densa = len(table.action)
+        _, segundos = timed(table.compress)
+        print(f"{n:>12} {table.n_states:>8} {densa:>9} {len(table.action):>10} {segundos:>10.4f}")
+
+#Gramatica de la seccion de producciones de un archivo .yalp (sin pasar por los pkl de LabC)
+def yalp_grammar(path):
+    with open(path, encoding='utf-8') as archivo:
+        contenido = archivo.read()
+    producciones = re.sub(r'/\*.*?\*/', '', contenido.split('%%', 1)[1], flags=re.S)
+    grammar = {}
+    for produccion in producciones.split(';'):
+        if ':' in produccion:
+            head, bodies = produccion.split(':', 1)
+            grammar[head.strip()] = [' '.join(body.split()) for body in bodies.split('|')]
+    return LR0.augment_grammar(grammar)
+
+#Entrada sintetica de n tokens para la gramatica de expresiones de yapar.yalp
+def expression_tokens(n):
+    tokens = ['id']
+    bloque = ['plus', 'lparen', 'id', 'times', 'id', 'rparen', 'times', 'id']
+    while len(tokens) + len(bloque) <= n:
+        tokens.extend(bloque)
+    return tokens
+
+#Parseo LR de entradas largas con la gramatica de yapar.yalp
+def bench_lr_parsing(token_counts=(100000, 300000, 1000000), path='yapar.yalp'):
+    grammar = yalp_grammar(path)
+    table = LR0.build_SLRTable(grammar)
+    print(f"{'tokens':>10} {'aceptada':>9} {'segundos':>10}")
+    for n in token_counts:
+        tokens = expression_tokens(n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aceptada, segundos = timed(LR0.LRParsing, table, iter(tokens))
+        print(f"{len(tokens):>10} {str(aceptada):>9} {segundos:>10.4f}")
+
+#Funcion segment de un scanner autonomo generado (sin encabezado, pie ni acciones ejecutadas)
+def generated_segment(afd, backend):
+    namespace = {'__name__': 'scanner_' + backend}
+    codigo = AfdLib.scanner_module(afd, backend=backend)
+    exec(compile(codigo, '<scanner ' + backend + '>', 'exec'), namespace)
+    return namespace['segment']
+
+#Recorrido de un texto por segmentos, igual que tokensRecognize pero sin imprimir ni ejecutar
+#acciones; devuelve los finales de los segmentos para comparar los backends
+#memo es el registro de pares fallidos de los scanners generados, se comparte en todo el texto
+def segment_ends(segment, txt):
+    ends = []
+    memo = [set(), 0]
+    first = 0
+    while first <= len(txt):
+        res = segment(txt, first, memo)
+        nextFirst = res[1] if res[0] else first + 1
+        ends.append(nextFirst)
+        first = nextFirst
+    return ends
+
+#Especificaciones y textos de entrada para comparar los scanners
+SCANNER_INPUTS = (
+    ('slr-1.yal', 'abc + x1 * (y2 + z) * delta9\n'),
+    ('yalex.yal', None),
+)
+
+#Scanner de objetos (AfdLib.segmentRecognize), tablas (AfdLib y modulo generado) y codigo directo
+#sobre las mismas entradas; todos deben producir los mismos segmentos
+def bench_scanners(sizes=(2000, 20000, 200000), object_limit=20000):
+    print(f"{'spec':>10} {'chars':>8} {'objetos':>9} {'tablas':>9} {'generado':>9} {'directo':>9}")
+    for spec, texto in SCANNER_INPUTS:
+        afd = LabC.build_scanner(spec)[0]
+        compiled = AfdLib.compile_afd(afd)
+        if texto is None:
+            with open('yapar.yalp', encoding='utf-8') as archivo:
+                texto = archivo.read()
+
+        backends = [
+            ('tablas', lambda txt, i, memo: AfdLib.segmentRecognizeCompiled(compiled, i, txt)),
+            ('generado', generated_segment(compiled, 'table')),
+            ('directo', generated_segment(compiled, 'direct')),
+        ]
+        for size in sizes:
+            txt = (texto * (size // len(texto) + 1))[:size]
+            columnas = []
+            if size <= object_limit:
+                ends, segundos = timed(segment_ends, lambda t, i, memo: AfdLib.segmentRecognize(afd, i, t), txt)
+                columnas.append(f"{segundos:>9.4f}")
+            else:
+                ends = None
+                columnas.append(f"{'-':>9}")
+            for nombre, segment in backends:
+                resultado, segundos = timed(segment_ends, segment, txt)
+                if ends is None:
+                    ends = resultado
+                assert resultado == ends, f"{nombre} difiere en {spec}"
+                columnas.append(f"{segundos:>9.4f}")
+            print(f"{spec:>10} {size:>8} " + " ".join(columnas))
+
+#Especificacion .yal sintetica: n palabras clave, identificadores y espacios en blanco
+def synthetic_yal(n):
+    lineas = ["let id = ['a'-'z']['a'-'z''0'-'9']*", "let ws = [' ''\\t''\\n']+", "", "rule tokens ="]
+    for i in range(n):
+        lineas.append('  | "' + synthetic_keyword(i) + '"  { print("KW' + str(i) + '") }')
+    lineas.append('  | id  { print("ID") }')
+    lineas.append('  | ws  { print("WS") }')
+    return "\n".join(lineas) + "\n"
+
+#Scanner generado por tablas contra el codificado directamente, con AFDs de muchos estados;
+#el costo por transicion del directo no debe crecer con el numero de estados
+def bench_direct_states(keyword_counts=(25, 100, 400), size=200000, repeticiones=3):
+    print(f"{'palabras':>8} {'estados':>8} {'tablas':>9} {'directo':>9}")
+    for n in keyword_counts:
+        with tempfile.NamedTemporaryFile('w', suffix='.yal', delete=False, encoding='utf-8') as archivo:
+            archivo.write(synthetic_yal(n))
+        try:
+            compiled = AfdLib.compile_afd(LabC.build_scanner(archivo.name)[0])
+        finally:
+            os.remove(archivo.name)
+        palabras = ' '.join([synthetic_keyword(i) for i in range(n)] + ['foo', 'kwzz9', 'bar12']) + '\n'
+        txt = (palabras * (size // len(palabras) + 1))[:size]
+
+        columnas = []
+        ends = None
+        for backend in ('table', 'direct'):
+            segment = generated_segment(compiled, backend)
+            segundos = None
+            for _ in range(repeticiones):
+                resultado, tiempo = timed(segment_ends, segment, txt)
+                segundos = tiempo if segundos is None else min(segundos, tiempo)
+            if ends is None:
+                ends = resultado
+            assert resultado == ends, f"{backend} difiere con {n} palabras"
+            columnas.append(f"{segundos:>9.4f}")
+        print(f"{n:>8} {compiled.n_states:>8} " + " ".join(columnas))
+
+#Motor de coincidencia mas larga sobre str (scan_segments) contra el de bytes (scan_bytes)
+#sobre la misma entrada en UTF-8; los lexemas de ambos deben coincidir
+def bench_bytes_scanner(sizes=(20000, 200000, 2000000)):
+    print(f"{'spec':>10} {'chars':>8} {'bytes':>9} {'str':>9} {'bytes':>9}")
+    for spec, texto in SCANNER_INPUTS:
+        compiled = AfdLib.compile_afd(LabC.build_scanner(spec)[0])
+        byte_afd = AfdLib.compile_bytes(compiled)
+        if texto is None:
+            with open('yapar.yalp', encoding='utf-8') as archivo:
+                texto = archivo.read()
+        for size in sizes:
+            txt = (texto * (size // len(texto) + 1))[:size]
+            data = memoryview(txt.encode('utf-8'))
+            segmentos, seg_str = timed(lambda: [txt[s:e] for _, s, e, _, _ in AfdLib.scan_segments(compiled, txt)])
+            rangos, seg_bytes = timed(lambda: list(AfdLib.scan_bytes(byte_afd, data)))
+            assert [AfdLib.lexeme_text(data, s, e) for _, s, e in rangos] == segmentos, f"bytes difiere en {spec}"
+            print(f"{spec:>10} {size:>8} {len(data):>9} {seg_str:>9.4f} {seg_bytes:>9.4f}")
+
+#Escalamiento del lexing por bloques en paralelo (scan_parallel) contra el numero de workers,
+#sobre un archivo temporal (mmap en cada worker) y sobre bytes (memoria compartida); todos los
+#resultados deben ser iguales al escaneo secuencial
+def bench_parallel_scanner(size=8000000, worker_counts=(1, 2, 4, 8), chunk_size=1 << 20):
+    spec, texto = SCANNER_INPUTS[0]
+    byte_afd = AfdLib.compile_bytes(AfdLib.compile_afd(LabC.build_scanner(spec)[0]))
+    data = ((texto * (size // len(texto) + 1))[:size]).encode('utf-8')
+    with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as archivo:
+        archivo.write(data)
+    try:
+        secuencial, base = timed(lambda: array('q', chain.from_iterable(AfdLib.scan_bytes(byte_afd, data))))
+        print(f"cpus: {os.cpu_count()}  bytes: {len(data)}  secuencial: {base:.4f}")
+        print(f"{'workers':>8} {'fuente':>8} {'segundos':>10} {'aceleracion':>12}")
+        for workers in worker_counts:
+            for fuente, source in (('archivo', archivo.name), ('bytes', data)):
+                segmentos, segundos = timed(AfdLib.scan_parallel, byte_afd, source, workers, chunk_size)
+                assert segmentos == secuencial, f"paralelo difiere con {workers} workers ({fuente})"
+                print(f"{workers:>8} {fuente:>8} {segundos:>10.4f} {base/segundos:>12.2f}")
+    finally:
+        os.remove(archivo.name)
+
+#Muchos documentos cortos (entrada1.txt - entrada3.txt repetidos): iter_tokens por documento
+#contra scan_batch en el proceso actual, con hilos y con procesos
+def bench_batch(document_count=6000, workers=4):
+    afd = AfdLib.load_table('afd_YAL.tbl')
+    textos = []
+    for i in (1, 2, 3):
+        with open('entrada' + str(i) + '.txt', encoding='utf-8') as archivo:
+            textos.append(archivo.read())
+    documentos = [textos[i % len(textos)] for i in range(document_count)]
+
+    esperado, base = timed(lambda: [list(AfdLib.iter_tokens(afd, documento)) for documento in documentos])
+    print(f"{'modo':>10} {'segundos':>10} {'docs/s':>10}")
+    print(f"{'iter':>10} {base:>10.4f} {document_count/base:>10.0f}")
+    for pool in (None, 'thread', 'process'):
+        resultados, segundos = timed(AfdLib.scan_batch, afd, documentos, pool, workers)
+        assert [resultado.tokens for resultado in resultados] == esperado, f"scan_batch difiere con {pool}"
+        print(f"{str(pool):>10} {segundos:>10.4f} {document_count/segundos:>10.0f}")
+
+
+BENCHMARKS = {
+    'afd_construction': bench_afd_construction,
+    'minimization': bench_minimization,
+    'char_classes': bench_char_classes,
+    'bitsets': bench_bitsets,
+    'lr0_automata': bench_lr0_automata,
+    'parse_table': bench_parse_table,
+    'lr_parsing': bench_lr_parsing,
+    'scanners': bench_scanners,
+    'direct_states': bench_direct_states,
+    'bytes_scanner': bench_bytes_scanner,
+    'parallel_scanner': bench_parallel_scanner,
+    'batch': bench_batch,
+}
+
+if __name__ == "__main__":
+    nombres = sys.argv[1:] or list(BENCHMARKS)
+    for nombre in nombres:
+        print("-----------------------------------------------------")
+        print(nombre)
+        print("-----------------------------------------------------")
+        BENCHMARKS[nombre]()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#Cache en disco de tablas compiladas (AFD de los scanners, tablas de parseo LR)
+#Cada entrada se guarda en un pkl cuyo nombre es el hash del contenido normalizado de la
+#especificacion y de la version del generador, asi una especificacion sin cambios se carga
+#sin reconstruir y cualquier cambio en el generador invalida las entradas anteriores
+#TABLE_CACHE_DIR cambia el directorio y TABLE_CACHE=0 desactiva la cache
+import hashlib
+import os
+import pickle
+
+GENERATOR_VERSION = '1'
+
+#Modulos cuyo codigo fuente forma parte de la version del generador
+GENERATOR_MODULES = ('regexLib.py', 'astLib.py', 'AfdLib.py', 'LabC.py', 'LR0.py', 'cacheLib.py')
+
+cache_dir = os.environ.get('TABLE_CACHE_DIR', '__tablecache__')
+enabled = os.environ.get('TABLE_CACHE', '1') != '0'
+
+#Huella del generador, se calcula una sola vez por proceso
+fingerprint_cache = {}
+
+def generator_fingerprint():
+    fingerprint = fingerprint_cache.get(GENERATOR_VERSION)
+    if fingerprint is None:
+        digest = hashlib.sha256(GENERATOR_VERSION.encode('utf-8'))
+        directorio = os.path.dirname(os.path.abspath(__file__))
+        for modulo in GENERATOR_MODULES:
+            try:
+                with open(os.path.join(directorio, modulo), 'rb') as archivo:
+                    digest.update(archivo.read())
+            except OSError:
+                digest.update(modulo.encode('utf-8'))
+        fingerprint = digest.hexdigest()
+        fingerprint_cache[GENERATOR_VERSION] = fingerprint
+    return fingerprint
+
+#Llave de una especificacion ya normalizada (estructura con repr determinista)
+def spec_key(kind, spec):
+    digest = hashlib.sha256()
+    digest.update(kind.encode('utf-8'))
+    digest.update(generator_fingerprint().encode('utf-8'))
+    digest.update(repr(spec).encode('utf-8'))
+    return digest.hexdigest()
+
+def entry_path(key):
+    return os.path.join(cache_dir, key + '.pkl')
+
+#Valor guardado para la llave, None si no existe o no se puede leer
+def load(key):
+    if not enabled:
+        return None
+    try:
+        with open(entry_path(key), 'rb') as archivo:
+            return pickle.load(archivo)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        #Entrada corrupta o de una version incompatible: se reconstruye
+        return None
+
+#Guarda el valor de forma atomica (archivo temporal + reemplazo); la cache es opcional,
+#por eso los errores de escritura solo devuelven False
+def store(key, value):
+    if not enabled:
+        return False
+    path = entry_path(key)
+    temporal = path + '.' + str(os.getpid()) + '.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temporal, 'wb') as archivo:
+            pickle.dump(value, archivo)
+        os.replace(temporal, path)
+        return True
+    except (OSError, pickle.PicklingError):
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return False
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#Pipeline en proceso del scanner al parser: los tokens de la entrada pasan directo a LR0.LRParsing,
+#sin escribir input_tokens.pkl, grammar.pkl, ignore_tokens.pkl ni compare_tokens.pkl
+#El scanner es un generador, asi el lexing avanza a medida que el parser pide tokens
+import LR0
+import AfdLib
+
+
+class ParsePipeline:
+    #afd: AFD del scanner de la entrada (.yal); spec: AfdLib.YaparSpec con la gramatica y los IGNORE
+    def __init__(self, afd, spec, table_method='SLR', plot=False):
+        self.afd = afd if isinstance(afd, AfdLib.CompiledAFD) else AfdLib.compile_afd(afd)
+        self.spec = spec
+        self.ignore_tokens = set(spec.ignore_tokens)
+        self.grammar = LR0.augment_grammar(spec.grammar)
+        #El automata y la tabla se construyen una sola vez y se guardan en la cache de tablas
+        self.parsing_table = LR0.cached_parse_table(self.grammar, table_method, plot=plot)
+
+    #Nombres de token de una fuente (str, archivo o iterador de str), sin ignorados
+    #Los segmentos no reconocidos se reportan con su linea y columna y pasan al parser como ERROR_TOKEN,
+    #que no es terminal de la gramatica, asi el parseo falla en vez de seguir sin ellos
+    def tokens(self, source):
+        ignore_tokens = self.ignore_tokens
+        for token_name, lexeme, offset, line, col in AfdLib.iter_tokens(self.afd, source):
+            if token_name == AfdLib.ERROR_TOKEN:
+                print(f"ERROR LEXICO en el caracter {offset} (linea {line}, columna {col})  (No aceptado):  '{lexeme}'")
+            elif token_name is None or token_name in ignore_tokens:
+                continue
+            yield token_name
+
+    #Parseo LR de una fuente; False si la tabla tiene conflictos
+    def parse(self, source):
+        if not self.parsing_table:
+            return False
+        return LR0.LRParsing(self.parsing_table, self.tokens(source))
+
+
+#Pipeline desde los archivos del generador: tablas de los dos scanners y la especificacion .yalp
+def pipeline_from_files(yal_table='afd_YAL.tbl', yapar_table='afd_YAPARYAL.tbl', yalp_path='conflicto.yalp',
+                        table_method='SLR', plot=False):
+    with open(yalp_path, 'r', encoding='utf-8') as archivo:
+        spec = AfdLib.load_spec(AfdLib.load_table(yapar_table), archivo.read())
+    return ParsePipeline(AfdLib.load_table(yal_table), spec, table_method, plot)
@@ -1,5 +1,92 @@
 ﻿# -*- coding: utf-8 -*-
 import string
+from bisect import bisect_right
+
+#Clase de caracteres como conjunto de intervalos de codepoints ordenados y disjuntos
+class CharSet:
+    __slots__ = ('ranges',)
+
+    def __init__(self, ranges=()):
+        merged = []
+        for lo, hi in sorted(r for r in ranges if r[0] <= r[1]):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        self.ranges = tuple(merged)
+
+    def __contains__(self, c):
+        if not isinstance(c, str) or len(c) != 1:
+            return False
+        cp = ord(c)
+        i = bisect_right(self.ranges, (cp, 0x10FFFF)) - 1
+        return i >= 0 and self.ranges[i][0] <= cp <= self.ranges[i][1]
+
+    def __eq__(self, other):
+        if not isinstance(other, CharSet):
+            return NotImplemented
+        return self.ranges == other.ranges
+
+    def __hash__(self):
+        return hash(self.ranges)
+
+    def __len__(self):
+        return sum(hi - lo + 1 for lo, hi in self.ranges)
+
+    def __str__(self):
+        partes = []
+        for lo, hi in self.ranges:
+            partes.append(repr(chr(lo))[1:-1] if lo == hi else repr(chr(lo))[1:-1] + '-' + repr(chr(hi))[1:-1])
+        return '[' + ''.join(partes) + ']'
+
+    def __repr__(self):
+        return 'CharSet(' + str(self) + ')'
+
+    #Estado serializable sin __dict__
+    def __getstate__(self):
+        return self.ranges
+
+    def __setstate__(self, ranges):
+        self.ranges = ranges
+
+#Intervalos (lo, hi) de una hoja del AST: caracter o CharSet
+def leafRanges(leaf):
+    if isinstance(leaf, CharSet):
+        return leaf.ranges
+    return ((ord(leaf), ord(leaf)),)
+
+#Particion del alfabeto en clases disjuntas a partir de las hojas (caracteres y CharSet)
+#Cada clase es un caracter (str) si cubre un solo codepoint, o un CharSet en otro caso
+def partitionAlphabet(leaves):
+    leaves = list(set(leaves))
+    events = {}
+    for index, leaf in enumerate(leaves):
+        for lo, hi in leafRanges(leaf):
+            events.setdefault(lo, []).append((index, 1))
+            events.setdefault(hi + 1, []).append((index, -1))
+
+    #Barrido sobre los limites de intervalos: firma = hojas que cubren el intervalo elemental
+    classes = {}
+    active = {}
+    boundaries = sorted(events)
+    for k, point in enumerate(boundaries):
+        for index, delta in events[point]:
+            active[index] = active.get(index, 0) + delta
+            if active[index] == 0:
+                del active[index]
+        if active and k + 1 < len(boundaries):
+            signature = frozenset(active)
+            classes.setdefault(signature, []).append((point, boundaries[k + 1] - 1))
+
+    alphabet = []
+    for ranges in classes.values():
+        if len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+            alphabet.append(chr(ranges[0][0]))
+        else:
+            alphabet.append(CharSet(ranges))
+
+    alphabet.sort(key=lambda symbol: leafRanges(symbol)[0])
+    return alphabet
 
 def tokenizeRegex(regex):
     tokens = []
@@ -141,7 +228,9 @@ def regexAlphabet(postfix):
     i=0
     while i<len(postfix):
         char = postfix[i]
-        if char[0] == '\\':
+        if isinstance(char, CharSet):
+            alphabet.add(char)
+        elif char[0] == '\\':
             if len(char)>1:
                 alphabet.add(char[1])
             else:
@@ -151,7 +240,7 @@ def regexAlphabet(postfix):
             
         i+=1
             
-    return alphabet
+    return partitionAlphabet(alphabet)
 
 def validateRegexSyntax(regex):
     if not balancedRegex(regex):
@@ -242,57 +331,38 @@ def formatRegEx(tokens):
                 elif operator == '?':
                     tokens[j:index + 1] = ['('] + tokens[j:index] + ['|', empty_symbol, ')']
     
-    #Funcion para reconstruir todas las clases en un solo formato ["abc..."]
+    #Funcion para convertir una clase [...] en un CharSet de intervalos, sin expandir los rangos
     def expand_character_class(char_class):
-       characters = []
+       ranges = []
        i=0
        while i < len(char_class):
            c = char_class[i]
            
            if c=="'":
                if char_class[i+1]=="\\":
-                   characters.append(char_class[i+2])
+                   ranges.append((ord(char_class[i+2]), ord(char_class[i+2])))
                    i+=1
                else:
-                   characters.append(char_class[i+1])
+                   ranges.append((ord(char_class[i+1]), ord(char_class[i+1])))
                i+=2
            elif c=="-":
-               start = characters.pop()
+               start = ranges.pop()[0]
                end = char_class[i+2]
                
-               for c in range(ord(start), ord(end) + 1):
-                   characters.append(chr(c))
+               ranges.append((start, ord(end)))
                i+=3
            elif c=='"':
                j=i+1
                while j<len(char_class):
                    if char_class[j]!='"':
-                       characters.append(char_class[j])
+                       ranges.append((ord(char_class[j]), ord(char_class[j])))
                    else:
                        break
                    j+=1
                i=j
            i+=1
        
-       expanded = ''.join(item for item in characters)
-       return expand_string('"'+expanded+'"')
-               
-
-    #Funcion para reconstruir la clase en formato ["abc.."] en (a|b|c...)    
-    def expand_string(string):
-        reserved = ['|','*','.','(',')','+','?']
-        expanded = []
-        
-        char_class = string[1:-1]
-        for c in char_class:
-            if c in reserved:
-                expanded.append('\\'+c)
-            else:
-                expanded.append(c)
-            expanded.append('|')
-        
-        expanded.pop()
-        return ['('] + [char for char in expanded] + [')']
+       return CharSet(ranges)
 
     # Manejar los casos de '+'
     i = 0
@@ -315,10 +385,9 @@ def formatRegEx(tokens):
     while i < len(tokens):
         token = tokens[i]
         
-        # Verifica si el token actual es una clase de caracteres
+        # Verifica si el token actual es una clase de caracteres, se conserva como una sola hoja
         if token.startswith('[') and token.endswith(']'):
-            expanded_tokens = expand_character_class(token)
-            res.extend(expanded_tokens)
+            res.append(expand_character_class(token))
             
         else:
             res.append(token)
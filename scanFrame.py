@@ -1,6 +1,13 @@
 import pickle
+import sys
 import LabC
 import AfLib
+import AfdLib
+
+#python scanFrame.py --standalone genera scanners autonomos (tablas embebidas, sin AfdLib)
+#python scanFrame.py --direct genera scanners autonomos con un bloque de codigo por estado
+BACKEND = 'direct' if '--direct' in sys.argv else 'table'
+STANDALONE = '--standalone' in sys.argv or BACKEND == 'direct'
 
 if __name__ == "__main__":
     
@@ -21,23 +28,22 @@ import AfdLib
 {header}
             
 if __name__ == "__main__":
-    #Lectura del objeto pkl
-    with open('afd_YAL.pkl', 'rb') as archivo_entrada:
-        afd = pickle.load(archivo_entrada)
+    #Tabla binaria del AFD, mapeada en memoria sin reconstruir objetos
+    afd = AfdLib.load_table('afd_YAL.tbl')
     
-    input_tokens = []
-    with open('input_tokens.pkl', 'wb') as archivo_input_tokens:
-            pickle.dump(input_tokens, archivo_input_tokens)
-        
     #Lectura del documento txt
     with open('entrada1.txt', 'r', encoding='utf-8') as file:
         txtContent = file.read()  # Leer todo el contenido del archivo
-        
-    AfdLib.tokensRecognizeYAL(afd,txtContent)
+
+    #Los tokens se acumulan en memoria y se escriben una sola vez en input_tokens.pkl
+    with AfdLib.BufferedTokenSink('input_tokens.pkl') as sink:
+        AfdLib.tokensRecognizeYAL(afd,txtContent,sink)
     
 {footer}
 """
 
+        if STANDALONE:
+            contenido = AfdLib.scanner_module(AfdLib.load_table('afd_YAL.tbl'), header, footer, 'entrada1.txt', 'input_tokens.pkl', BACKEND)
 
         # Especificar el nombre del archivo que deseas crear
         nombre_archivo = 'ScanYal.py'
@@ -77,9 +83,8 @@ import AfdLib
 {header}
             
 if __name__ == "__main__":
-    #Lectura del objeto pkl
-    with open('afd_YAPARYAL.pkl', 'rb') as archivo_entrada:
-        afd = pickle.load(archivo_entrada)
+    #Tabla binaria del AFD, mapeada en memoria sin reconstruir objetos
+    afd = AfdLib.load_table('afd_YAPARYAL.tbl')
             
     #Lectura del documento txt
     with open('conflicto.yalp', 'r', encoding='utf-8') as file:
@@ -90,6 +95,8 @@ if __name__ == "__main__":
 {footer}
 """
 
+        if STANDALONE:
+            contenido = AfdLib.scanner_module(AfdLib.load_table('afd_YAPARYAL.tbl'), header, footer, 'conflicto.yalp', backend=BACKEND)
 
         # Especificar el nombre del archivo que deseas crear
         nombre_archivo = 'Scan.py'
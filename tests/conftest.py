@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+#LabC.build_scanner escribe grammar.pkl, ignore_tokens.pkl, etc. en el directorio actual;
+#las pruebas corren en un directorio temporal para no modificar los del repositorio
+@pytest.fixture(scope='session', autouse=True)
+def directorio_temporal(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp('trabajo'))
+        yield
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#Pruebas del pipeline scanner -> parser en proceso
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import AfdLib
+import LabC
+import LR0
+import pipeline
+
+
+def ruta(nombre):
+    return os.path.join(RAIZ, nombre)
+
+
+@pytest.fixture(scope='module')
+def pipeline_slr1():
+    afd = AfdLib.compile_afd(LabC.build_scanner(ruta('slr-1.yal'))[0])
+    with open(ruta('slr-1.yalp'), 'r', encoding='utf-8') as archivo:
+        spec = AfdLib.load_spec(AfdLib.load_table(ruta('afd_YAPARYAL.tbl')), archivo.read())
+    return pipeline.ParsePipeline(afd, spec)
+
+
+def test_parse_aceptado(pipeline_slr1):
+    assert list(pipeline_slr1.tokens('a + b')) == ['ID', 'PLUS', 'ID']
+    assert pipeline_slr1.parse('a + b * (c)')
+
+
+#Un segmento no reconocido se reporta con linea y columna y el parseo falla
+def test_error_lexico(pipeline_slr1, capsys):
+    assert list(pipeline_slr1.tokens('a +\n b ; c')) == ['ID', 'PLUS', 'ID', AfdLib.ERROR_TOKEN, 'ID']
+    assert "(linea 2, columna 4)" in capsys.readouterr().out
+    assert not pipeline_slr1.parse('a + $$ b')
+
+
+#tokensRecognizeYAL (sumidero), iter_tokens y el scanner generado dan los mismos nombres de token
+@pytest.mark.parametrize('texto', ['/* c */ %%\n', None])
+def test_tokens_sumidero_y_stream(tmp_path, texto):
+    afd = AfdLib.compile_afd(LabC.build_scanner(ruta('yalex.yal'))[0])
+    if texto is None:
+        with open(ruta('slr-1.yalp'), 'r', encoding='utf-8') as archivo:
+            texto = archivo.read()
+
+    path = str(tmp_path / 'tokens.pkl')
+    with AfdLib.BufferedTokenSink(path) as sink:
+        AfdLib.tokensRecognizeYAL(afd, texto, sink)
+    esperado = [token for token, lexeme, offset, line, col in AfdLib.iter_tokens(afd, texto)
+                if token is not None and token != AfdLib.ERROR_TOKEN]
+    assert list(AfdLib.read_tokens(path)) == esperado
+
+    generado = str(tmp_path / 'generado.pkl')
+    ns = {'__name__': 'scanner_prueba'}
+    exec(compile(AfdLib.scanner_module(afd, tokens_path=generado), '<scanner>', 'exec'), ns)
+    ns['tokensRecognize'](texto, generado)
+    assert list(AfdLib.read_tokens(generado)) == esperado
+
+    if texto == '/* c */ %%\n':
+        assert esperado == ['COMMENT', 'WHITESPACE', 'PRODSECTION', 'WHITESPACE']
+
+
+#El pickle del sumidero se escribe una sola vez aunque se cierre de nuevo
+def test_sumidero_una_escritura(tmp_path, monkeypatch):
+    afd = AfdLib.compile_afd(LabC.build_scanner(ruta('slr-1.yal'))[0])
+    escrituras = []
+    dump = AfdLib.pickle.dump
+    monkeypatch.setattr(AfdLib.pickle, 'dump', lambda obj, archivo: (escrituras.append(list(obj)), dump(obj, archivo)))
+
+    path = str(tmp_path / 'tokens.pkl')
+    with AfdLib.BufferedTokenSink(path) as sink:
+        AfdLib.tokensRecognizeYAL(afd, 'a + b', sink)
+        assert escrituras == []
+    sink.close()
+    assert escrituras == [['ID', 'WS', 'PLUS', 'WS', 'ID']]
+    assert list(AfdLib.read_tokens(path)) == escrituras[0]
+
+    with AfdLib.BufferedTokenSink(str(tmp_path / 'vacio.pkl')):
+        pass
+    assert list(AfdLib.read_tokens(str(tmp_path / 'vacio.pkl'))) == []
+
+
+#LRParsing usa la gramatica de la tabla: los tokens que no son terminales se reportan
+@pytest.mark.parametrize('token', ['FOO', 'expression'])
+def test_token_no_terminal(pipeline_slr1, capsys, token):
+    assert LR0.LRParsing(pipeline_slr1.parsing_table, iter(['ID', 'PLUS', 'ID']))
+    assert not LR0.LRParsing(pipeline_slr1.parsing_table, iter(['ID', 'PLUS', token]))
+    assert f"el token '{token}' no es un terminal" in capsys.readouterr().out
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#Pruebas del scanner: el maximal munch es lineal aun con corridas de error
+#Se cuentan los accesos a la entrada, no solo se compara la salida
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AfdLib
+import LabC
+
+
+#Accesos por posicion de la entrada permitidos (el recorrido y su repeticion al registrar los fallos)
+MAX_ACCESOS = 8
+
+
+class Contador(str):
+    accesos = 0
+
+    def __getitem__(self, k):
+        Contador.accesos += 1
+        return str.__getitem__(self, k)
+
+
+#Cuenta las consultas de columna de iter_tokens, que lee de un buffer propio
+class MapaContador(dict):
+    accesos = 0
+
+    def get(self, k, default=None):
+        MapaContador.accesos += 1
+        return dict.get(self, k, default)
+
+
+class BytesContador(bytes):
+    accesos = 0
+
+    def __getitem__(self, k):
+        BytesContador.accesos += 1
+        return bytes.__getitem__(self, k)
+
+
+def compilar(tmp_path, reglas):
+    path = tmp_path / 'spec.yal'
+    path.write_text("".join(f"let r{k} = {r}\n" for k, r in enumerate(reglas)) + "\nrule tokens =\n"
+                    + "\n".join(f"  | r{k}  {{ print(\"T{k}\") }}" for k in range(len(reglas))) + "\n")
+    return AfdLib.compile_afd(LabC.build_scanner(str(path))[0])
+
+
+def modulo(afd, backend):
+    ns = {'__name__': 'scanner_prueba'}
+    exec(compile(AfdLib.scanner_module(afd, backend=backend), '<scanner>', 'exec'), ns)
+    return ns
+
+
+#Referencia cuadratica: maximal munch desde cada posicion
+def referencia(afd, txt):
+    segmentos = []
+    i = 0
+    error = -1
+    while i < len(txt):
+        resultado = AfdLib.segmentRecognizeCompiled(afd, i, txt)
+        if not resultado[0]:
+            if error < 0:
+                error = i
+            i += 1
+            continue
+        if error >= 0:
+            segmentos.append((-1, error, i))
+            error = -1
+        segmentos.append((resultado[4], i, resultado[1]))
+        i = resultado[1]
+    if error >= 0:
+        segmentos.append((-1, error, len(txt)))
+    return segmentos
+
+
+#'a'*'b' sobre 'aaa...a': desde cada posicion se lee hasta el final sin aceptar
+@pytest.fixture
+def afd_ab(tmp_path):
+    return compilar(tmp_path, ["'a'*'b'", "' '"])
+
+
+@pytest.mark.parametrize('n', [2000, 8000])
+def test_scan_segments_lineal(afd_ab, n):
+    Contador.accesos = 0
+    segmentos = list(AfdLib.scan_segments(afd_ab, Contador('a'*n)))
+    assert [s[:3] for s in segmentos] == [(-1, 0, n)]
+    assert 0 < Contador.accesos <= MAX_ACCESOS*n
+
+
+@pytest.mark.parametrize('n', [2000, 8000])
+def test_scan_bytes_lineal(afd_ab, n):
+    BytesContador.accesos = 0
+    segmentos = list(AfdLib.scan_bytes(AfdLib.compile_bytes(afd_ab), BytesContador(b'a'*n)))
+    assert [s[:3] for s in segmentos] == [(-1, 0, n)]
+    assert 0 < BytesContador.accesos <= MAX_ACCESOS*n
+
+
+@pytest.mark.parametrize('n', [2000, 8000])
+def test_iter_tokens_lineal(afd_ab, n):
+    afd_ab.char_map = MapaContador(afd_ab.char_map)
+    MapaContador.accesos = 0
+    tokens = list(AfdLib.iter_tokens(afd_ab, iter(['a'*(n//4)]*4), 100))
+    assert [(t[0], t[2]) for t in tokens] == [(AfdLib.ERROR_TOKEN, 0)]
+    assert 0 < MapaContador.accesos <= MAX_ACCESOS*n
+
+
+@pytest.mark.parametrize('backend', ['table', 'direct'])
+@pytest.mark.parametrize('n', [2000, 8000])
+def test_scanner_generado_lineal(afd_ab, backend, n):
+    scan = modulo(afd_ab, backend)['scan']
+    Contador.accesos = 0
+    segmentos = list(scan(Contador('a'*n)))
+    assert [s[:3] for s in segmentos] == [(-1, 0, n)]
+    assert 0 < Contador.accesos <= MAX_ACCESOS*n
+
+
+#Los escaneos lineales dan los mismos segmentos que la referencia
+@pytest.mark.parametrize('reglas', [
+    ["'a'*'b'", "'a'", "' '"],
+    ["('a''b')*'c'", "'a''b'", "'b'"],
+    ["('a'|'b')*'c'", "' '"],
+])
+def test_equivalencia(tmp_path, reglas):
+    afd = compilar(tmp_path, reglas)
+    bytesAfd = AfdLib.compile_bytes(afd)
+    generados = [modulo(afd, 'table')['scan'], modulo(afd, 'direct')['scan']]
+    for txt in ['', 'aaab', 'ababac', 'abab abc', 'aaaa aab', 'bbbbc', 'abababa', 'a b c ab', 'cab aaa ababc']:
+        esperado = referencia(afd, txt)
+        assert [s[:3] for s in AfdLib.scan_segments(afd, txt)] == esperado
+        assert [s[:3] for s in AfdLib.scan_bytes(bytesAfd, txt.encode())] == esperado
+        for scan in generados:
+            assert [s[:3] for s in scan(txt)] == esperado
+
+
+#scan_parallel con bloques pequenos (limites dentro de tokens y de corridas de error) da los
+#mismos segmentos que scan_bytes, desde bytes (memoria compartida) y desde un archivo (mmap)
+@pytest.mark.parametrize('fuente', ['bytes', 'archivo'])
+def test_scan_parallel(tmp_path, monkeypatch, fuente):
+    afd = AfdLib.compile_bytes(compilar(tmp_path, ["'a'*'b'", "'a'", "' '", "'\"'[^'\"']*'\"'"]))
+    data = ('aab a"x y"\naaaa b\n"aa\n ab' * 40 + 'aaaa').encode()
+    esperado = list(AfdLib.scan_bytes(afd, data))
+    source = data
+    if fuente == 'archivo':
+        source = str(tmp_path / 'entrada.txt')
+        with open(source, 'wb') as archivo:
+            archivo.write(data)
+    monkeypatch.setattr(AfdLib, 'PARALLEL_MIN_SIZE', 0)
+    for chunk_size in (3, 7, 64):
+        assert list(AfdLib.flat_segments(AfdLib.scan_parallel(afd, source, 2, chunk_size))) == esperado